@@ -18,14 +18,93 @@ class Config:
     TOP_K = 40
     TOP_P = 0.95
     
+    # HTTP connection pool (shared AsyncClient per upstream)
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_KEEPALIVE_EXPIRY = 30.0  # Seconds an idle connection is kept open
+    HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+    GEMINI_CONNECT_TIMEOUT = 10.0
+    GEMINI_READ_TIMEOUT = 60.0  # Gemini 2.5 Pro thinking can take a while
+    DOCS_CONNECT_TIMEOUT = 5.0
+    DOCS_READ_TIMEOUT = 10.0
+    DOCS_BATCH_DEADLINE = 15.0  # Overall deadline for concurrent multi-page fetches
+    
+    # Live documentation page store (URL-keyed, revalidated with ETag/Last-Modified)
+    PAGE_STORE_PATH = "cache/pages.db"
+    PAGE_STORE_FRESH_SECONDS = 600        # Serve stored text without revalidating for 10 minutes
+    PAGE_STORE_TTL = 7 * 24 * 3600        # Drop pages not fetched or revalidated for a week
+    
+    # Live documentation context (structure-aware chunks)
+    CHUNK_MAX_TOKENS = 400            # Long prose sections are split into chunks of at most this size
+    LIVE_CONTEXT_TOKEN_BUDGET = 2000  # Tokens of live documentation chunks sent to the LLM
+    
     # RAG Configuration
     TOP_K_DOCUMENTS = 5  # Retrieve more documents for better context
+    CONTEXT_CANDIDATES = 15       # Ranked sections the context packer chooses TOP_K_DOCUMENTS from
+    CONTEXT_TOKEN_BUDGET = 8000   # Tokens of knowledge base sections sent to the LLM
+    CONTEXT_MMR_LAMBDA = 0.7      # Relevance vs. diversity when packing (1.0 = relevance only)
+    CONTEXT_NEAR_DUPLICATE = 0.8  # Word-shingle similarity at which a section counts as a duplicate
+    BM25_K1 = 1.5  # Term frequency saturation
+    BM25_B = 0.75  # Document length normalization
+    VECTOR_DIM = 512  # Hashed n-gram embedding size
+    VECTOR_MIN_SIMILARITY = 0.2  # Cosine threshold for semantic fallback
+    VECTOR_STORE_DIR = "cache/vector_store"
+    ERROR_CATALOG_PATH = "cache/error_catalog.json"
+    
+    # Cache Configuration (bounded in-memory tiers over a persistent store)
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")  # "sqlite" (WAL) or "json"
+    RESPONSE_CACHE_MAX_ENTRIES = 2000
+    RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    RESPONSE_CACHE_SEMANTIC_THRESHOLD = 0.9  # Cosine similarity for near-duplicate question hits
+    DOC_CACHE_MAX_ENTRIES = 500
+    DOC_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    CACHE_SWEEP_INTERVAL = 60  # Seconds between expired-entry sweeps
+    
+    # Analytics persistence (write-behind)
+    ANALYTICS_FLUSH_INTERVAL = 5.0  # Max seconds before buffered events are written
+    ANALYTICS_FLUSH_EVERY = 50      # Flush early once this many events are buffered
+    
+    # Analytics aggregates
+    ANALYTICS_TOP_K = 100             # Queries tracked for top/unanswered lists
+    ANALYTICS_RECENT_FEEDBACK = 100   # Recent feedback entries kept in ring buffers
+    ANALYTICS_HOURLY_BUCKETS = 48     # Hourly rollups kept (2 days)
+    ANALYTICS_DAILY_BUCKETS = 90      # Daily rollups kept
+    ANALYTICS_BUCKET_SKETCH_SIZE = 50 # Heavy-hitter counters per rollup bucket
+    
+    # Per-client query sketches (bounded memory)
+    ANALYTICS_CLIENT_MEMORY_BUDGET = int(os.getenv("ANALYTICS_CLIENT_MEMORY_BUDGET", str(16 * 1024 * 1024)))
+    ANALYTICS_CLIENT_SKETCH_WIDTH = 256
+    ANALYTICS_CLIENT_SKETCH_DEPTH = 4
+    ANALYTICS_CLIENT_TOP_K = 10
+    ANALYTICS_CLIENT_IDLE_SECONDS = 30 * 24 * 3600  # Drop clients inactive for 30 days
+    
+    # LLM token usage aggregates
+    ANALYTICS_USAGE_MAX_CLIENTS = 10000  # Clients with per-client totals (least recently seen dropped)
     
     # Data Paths
     KNOWLEDGE_BASE_PATH = "knowledge-base.json"
     KNOWLEDGE_BASE_EXTENDED_PATH = "knowledge-base-extended.json"
     COMPLETE_DOCS_PATH = "complete-documentation.json"
     
+    # Knowledge base files indexed at startup for local search
+    KNOWLEDGE_BASE_FILES = [
+        "knowledge-base.json",
+        "knowledge-base-extended.json",
+        "knowledge-base-dynamic.json",
+        "knowledge-base-rooms-rates.json",
+        "data/knowledge-base.json",
+        "data/knowledge-base-extended.json",
+        "data/complete-documentation.json",
+        "data/docs-snapshot.json"
+    ]
+    KB_RELOAD_INTERVAL = 10  # Seconds between knowledge base change checks
+    
+    # Offline docs crawl (crawl_docs.py)
+    DOCS_SNAPSHOT_PATH = "data/docs-snapshot.json"
+    CRAWL_CONCURRENCY = 4
+    CRAWL_RATE_LIMIT = 2.0      # Requests per second
+    CRAWL_PARSE_WORKERS = None  # Parser processes (None = CPU count)
+    
     # Server Configuration
     HOST = "0.0.0.0"
     PORT = 8080
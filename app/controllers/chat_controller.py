@@ -1,11 +1,14 @@
 # app/controllers/chat_controller.py
 from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+import json
 import time
 
 from app.models.schemas import ChatRequest, ChatResponse, Source, ExplainRequest, ExplainResponse, FeedbackRequest, FeedbackResponse
 from app.services.rag_service import RAGService
 from app.utils.analytics import analytics
+from app.utils.metrics import stage, start_timings, current_timings, track_request, track_endpoint, timings_ms, LLM_TOKENS
 
 router = APIRouter(prefix="/api", tags=["chat"])
 
@@ -27,7 +30,88 @@ async def health():
         "llm": "gemini-2.5-pro"
     }
 
+@router.get("/stats")
+async def stats():
+    """Runtime statistics for monitoring (connection pools, caches, request coalescing)"""
+    return {
+        "llm_http_pool": rag_service.llm_client.get_pool_stats(),
+        "docs_http_pool": rag_service.doc_fetcher.get_pool_stats(),
+        "cache": rag_service.cache_service.get_cache_stats(),
+        "page_store": rag_service.doc_fetcher.page_store.get_stats(),
+        "analytics_clients": analytics.client_sketches.get_stats(),
+        "coalescing": {
+            "answers": rag_service.single_flight.get_stats(),
+            "documentation": rag_service.doc_fetcher.single_flight.get_stats()
+        }
+    }
+
+def _log_usage(endpoint: str, client_id: str, result: dict, latency_ms: int) -> Optional[int]:
+    """
+    Record the LLM token usage of a result; returns the tokens this request spent
+    
+    Answers reused from the response cache or from a coalesced in-flight call
+    spent none. None when no usage was reported (e.g. no documentation found).
+    """
+    usage = result.get("usage")
+    reused = bool(result.get("cache_tier") or result.get("coalesced"))
+    analytics.log_usage(endpoint, client_id, result.get("source_type"), usage, reused, latency_ms)
+    if reused:
+        return 0
+    if not usage:
+        return None
+    
+    source_type = result.get("source_type") or "none"
+    for kind in ("prompt", "output", "thinking"):
+        LLM_TOKENS.inc(usage.get(f"{kind}_tokens", 0), endpoint=endpoint, source_type=source_type, kind=kind)
+    return usage.get("total_tokens")
+
+def _build_chat_response(result: dict, latency_ms: int, timings: Optional[dict] = None,
+                         tokens_used: Optional[int] = None) -> ChatResponse:
+    """Convert a RAG service result into a ChatResponse"""
+    # Build sources with proper format
+    sources = []
+    for source_meta in result.get("sources", []):
+        # Get URL from metadata
+        url = source_meta.get("url", "https://docs-hotel.prod.zentrumhub.com")
+        source_type = source_meta.get("source", "documentation")
+        title = source_meta.get("key", source_meta.get("title", "ZentrumHub API Documentation"))
+        
+        # Extract snippet from answer (first 150 chars)
+        snippet = result["answer"][:150] + "..." if len(result["answer"]) > 150 else result["answer"]
+        
+        sources.append(Source(
+            title=title,
+            section=source_type,
+            url=url,
+            snippet=snippet
+        ))
+    
+    # If no sources, add default
+    if not sources and result.get("source_type") == "live_documentation":
+        sources.append(Source(
+            title="ZentrumHub Hotel API Documentation",
+            section="live_docs",
+            url="https://docs-hotel.prod.zentrumhub.com/docs",
+            snippet=result["answer"][:150] + "..." if len(result["answer"]) > 150 else result["answer"]
+        ))
+    
+    return ChatResponse(
+        answer=result["answer"],
+        confidence=result["confidence"],
+        sources=sources,
+        tokens_used=tokens_used,
+        latency_ms=latency_ms,
+        service_used="gemini_2.5_pro",
+        cache_tier=result.get("cache_tier"),
+        timings=timings
+    )
+
+def _sse_event(event: str, data: dict) -> str:
+    """Format a Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 @router.post("/chat", response_model=ChatResponse)
+@track_endpoint("chat")
 async def chat(request: ChatRequest):
     """
     Main chat endpoint
@@ -45,49 +129,61 @@ async def chat(request: ChatRequest):
         
         # Log analytics
         client_id = request.conversation_id or "unknown"
-        analytics.log_query(request.question, result["confidence"], client_id)
+        with stage("analytics_write"):
+            analytics.log_query(request.question, result["confidence"], client_id)
+            tokens_used = _log_usage("chat", client_id, result, latency_ms)
         
-        # Build sources with proper format
-        sources = []
-        for source_meta in result.get("sources", []):
-            # Get URL from metadata
-            url = source_meta.get("url", "https://docs-hotel.prod.zentrumhub.com")
-            source_type = source_meta.get("source", "documentation")
-            title = source_meta.get("key", source_meta.get("title", "ZentrumHub API Documentation"))
-            
-            # Extract snippet from answer (first 150 chars)
-            snippet = result["answer"][:150] + "..." if len(result["answer"]) > 150 else result["answer"]
-            
-            sources.append(Source(
-                title=title,
-                section=source_type,
-                url=url,
-                snippet=snippet
-            ))
-        
-        # If no sources, add default
-        if not sources and result.get("source_type") == "live_documentation":
-            sources.append(Source(
-                title="ZentrumHub Hotel API Documentation",
-                section="live_docs",
-                url="https://docs-hotel.prod.zentrumhub.com/docs",
-                snippet=result["answer"][:150] + "..." if len(result["answer"]) > 150 else result["answer"]
-            ))
-        
-        # Return response
-        return ChatResponse(
-            answer=result["answer"],
-            confidence=result["confidence"],
-            sources=sources,
-            tokens_used=None,
-            latency_ms=latency_ms,
-            service_used="gemini_2.5_pro"
-        )
+        timings = timings_ms(current_timings(), latency_ms) if request.include_timings else None
+        return _build_chat_response(result, latency_ms, timings, tokens_used)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming chat endpoint (Server-Sent Events)
+    
+    Sends "token" events as the answer is generated, then a final "done"
+    event carrying the full ChatResponse. Failures are sent as an "error" event.
+    """
+    start_time = time.time()
+    
+    async def event_stream():
+        timings = start_timings()
+        try:
+            with track_request("chat_stream"):
+                async for event in rag_service.generate_answer_stream(request.question):
+                    if event["type"] == "token":
+                        yield _sse_event("token", {"text": event["text"]})
+                        continue
+                    
+                    result = event["response"]
+                    latency_ms = int((time.time() - start_time) * 1000)
+                    
+                    # Log analytics once the answer is complete
+                    client_id = request.conversation_id or "unknown"
+                    with stage("analytics_write"):
+                        analytics.log_query(request.question, result["confidence"], client_id)
+                        tokens_used = _log_usage("chat_stream", client_id, result, latency_ms)
+                    
+                    response_timings = timings_ms(timings, latency_ms) if request.include_timings else None
+                    response = _build_chat_response(result, latency_ms, response_timings, tokens_used)
+                    yield _sse_event("done", response.model_dump())
+        except Exception as e:
+            yield _sse_event("error", {"detail": f"Error processing request: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering so tokens flush immediately
+        }
+    )
+
 @router.post("/explain", response_model=ExplainResponse)
+@track_endpoint("explain")
 async def explain(request: ExplainRequest):
     """
     Explain error codes and API issues
@@ -105,7 +201,9 @@ async def explain(request: ExplainRequest):
         
         # Log analytics
         client_id = request.client_id or "unknown"
-        analytics.log_query(f"[EXPLAIN] {request.content}", result["confidence"], client_id)
+        with stage("analytics_write"):
+            analytics.log_query(f"[EXPLAIN] {request.content}", result["confidence"], client_id)
+            tokens_used = _log_usage("explain", client_id, result, latency_ms)
         
         # Parse the structured answer with improved logic
         answer = result["answer"]
@@ -192,7 +290,9 @@ async def explain(request: ExplainRequest):
             details=details[:5],
             recommended_actions=recommended_actions[:5],
             sources=sources,
-            confidence=result["confidence"]
+            confidence=result["confidence"],
+            tokens_used=tokens_used,
+            timings=timings_ms(current_timings(), latency_ms) if request.include_timings else None
         )
     
     except Exception as e:
@@ -214,35 +314,43 @@ async def suggested_questions():
     }
 
 @router.get("/analytics/top-queries")
-async def top_queries(limit: int = 10):
-    """Get top queries analytics"""
-    return {
-        "total_queries": analytics.get_total_queries(),
-        "top_queries": analytics.get_top_queries(limit)
-    }
+async def top_queries(limit: int = 10, window: Optional[str] = None):
+    """Get top queries analytics, optionally for a recent window (e.g. 24h, 7d)"""
+    try:
+        return {
+            "window": window,
+            "total_queries": analytics.get_total_queries(window),
+            "top_queries": analytics.get_top_queries(limit, window)
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/analytics/top-queries/by-client")
 async def top_queries_by_client(client_id: str, limit: int = 5):
-    """Get top queries by specific client"""
-    client_queries = analytics.client_query_counter.get(client_id, {})
-    data = sorted(client_queries.items(), key=lambda x: x[1], reverse=True)[:limit]
-    
+    """Get top queries by specific client (approximate counts from per-client sketches)"""
     return {
         "client_id": client_id,
-        "total_queries": sum(client_queries.values()),
-        "top_queries": [{"question": q, "count": c} for q, c in data]
+        **analytics.get_client_top_queries(client_id, limit)
     }
 
 @router.get("/analytics/unanswered-questions")
-async def unanswered_questions(limit: int = 20):
-    """Get unanswered questions"""
+async def unanswered_questions(limit: int = 20, window: Optional[str] = None):
+    """Get unanswered questions, optionally for a recent window (e.g. 24h, 7d)"""
+    try:
+        questions = analytics.get_unanswered_questions(limit, window)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {
-        "total_unanswered": sum(
-            q["count"] for q in analytics.get_unanswered_questions(limit)
-        ),
-        "questions": analytics.get_unanswered_questions(limit)
+        "window": window,
+        "total_unanswered": sum(q["count"] for q in questions),
+        "questions": questions
     }
 
+@router.get("/analytics/token-usage")
+async def token_usage(limit: int = 10):
+    """Get LLM token usage per endpoint, per source_type and for the top clients by tokens spent"""
+    return analytics.get_token_usage(limit)
+
 @router.post("/analytics/feedback", response_model=FeedbackResponse)
 async def submit_feedback(request: FeedbackRequest):
     """Submit user feedback for a chat response"""
@@ -275,9 +383,12 @@ async def submit_feedback_alias(request: FeedbackRequest):
     return await submit_feedback(request)
 
 @router.get("/analytics/feedback-stats")
-async def feedback_stats():
-    """Get feedback statistics"""
-    return analytics.get_feedback_stats()
+async def feedback_stats(window: Optional[str] = None):
+    """Get feedback statistics, optionally for a recent window (e.g. 24h, 7d)"""
+    try:
+        return analytics.get_feedback_stats(window)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/analytics/negative-feedback")
 async def negative_feedback(limit: int = 20):
@@ -285,3 +396,14 @@ async def negative_feedback(limit: int = 20):
     return {
         "negative_feedback": analytics.get_negative_feedback(limit)
     }
+
+@router.get("/analytics/rollups")
+async def rollups(granularity: str = "hourly", limit: int = 24):
+    """Get per-hour or per-day query and feedback counts, newest first"""
+    try:
+        return {
+            "granularity": granularity,
+            "buckets": analytics.get_rollups(granularity, limit)
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
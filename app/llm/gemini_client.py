@@ -1,9 +1,10 @@
 # app/llm/gemini_client.py
 import httpx
 import json
-from typing import Dict, Any
-from app.llm.llm_client import LLMClient
+from typing import Dict, Any, Optional, AsyncIterator
+from app.llm.llm_client import LLMClient, LLMResult, TokenUsage
 from app.config import config
+from app.utils.http_client import create_async_client, get_pool_stats
 
 class GeminiClient(LLMClient):
     """Gemini 2.5 Pro LLM Client"""
@@ -15,20 +16,40 @@ class GeminiClient(LLMClient):
         
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY not found in environment variables")
-    
-    async def generate(self, prompt: str) -> str:
-        """
-        Generate response from Gemini 2.5 Pro
-        
-        Args:
-            prompt: The complete prompt with context
-            
-        Returns:
-            Generated text response
-        """
-        url = f"{self.base_url}/{self.model}:generateContent"
         
-        payload = {
+        # Shared pooled client - opened at app startup, closed at shutdown
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    async def start(self):
+        """Open the shared HTTP client"""
+        if self._client is None or self._client.is_closed:
+            self._client = create_async_client(
+                max_connections=config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+                connect_timeout=config.GEMINI_CONNECT_TIMEOUT,
+                read_timeout=config.GEMINI_READ_TIMEOUT,
+                http2=config.HTTP2_ENABLED
+            )
+    
+    async def aclose(self):
+        """Close the shared HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Shared client, opened lazily when used outside the app lifecycle"""
+        await self.start()
+        return self._client
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool statistics"""
+        return get_pool_stats(self._client)
+    
+    def _build_payload(self, prompt: str) -> Dict[str, Any]:
+        """Build the generateContent request body"""
+        return {
             "contents": [{
                 "parts": [{
                     "text": prompt
@@ -41,25 +62,87 @@ class GeminiClient(LLMClient):
                 "maxOutputTokens": config.MAX_OUTPUT_TOKENS
             }
         }
+    
+    async def generate(self, prompt: str) -> str:
+        """
+        Generate response from Gemini 2.5 Pro
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url,
-                params={"key": self.api_key},
-                json=payload,
-                timeout=60.0  # Increased timeout for Gemini 2.5 Pro thinking
-            )
-            response.raise_for_status()
+        Args:
+            prompt: The complete prompt with context
             
-            data = response.json()
+        Returns:
+            Generated text response
+        """
+        return (await self.complete(prompt)).text
+    
+    async def complete(self, prompt: str) -> LLMResult:
+        """Generate a response with token usage from usageMetadata"""
+        url = f"{self.base_url}/{self.model}:generateContent"
+        
+        client = await self._get_client()
+        response = await client.post(
+            url,
+            params={"key": self.api_key},
+            json=self._build_payload(prompt)
+        )
+        response.raise_for_status()
+        
+        data = response.json()
+        
+        # Extract text from response
+        if data.get("candidates") and len(data["candidates"]) > 0:
+            candidate = data["candidates"][0]
+            if candidate.get("content") and candidate["content"].get("parts"):
+                return LLMResult(
+                    text=candidate["content"]["parts"][0]["text"],
+                    usage=TokenUsage.from_gemini(data.get("usageMetadata"))
+                )
+        
+        raise ValueError("Unexpected response format from Gemini")
+    
+    async def generate_stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Stream response from Gemini 2.5 Pro via streamGenerateContent (SSE)
+        
+        Args:
+            prompt: The complete prompt with context
             
-            # Extract text from response
-            if data.get("candidates") and len(data["candidates"]) > 0:
-                candidate = data["candidates"][0]
-                if candidate.get("content") and candidate["content"].get("parts"):
-                    return candidate["content"]["parts"][0]["text"]
+        Yields:
+            Text chunks as they are generated
+        """
+        async for chunk in self.complete_stream(prompt):
+            if chunk.text:
+                yield chunk.text
+    
+    async def complete_stream(self, prompt: str) -> AsyncIterator[LLMResult]:
+        """Stream response chunks; token usage follows in a final empty chunk"""
+        url = f"{self.base_url}/{self.model}:streamGenerateContent"
+        
+        client = await self._get_client()
+        async with client.stream(
+            "POST",
+            url,
+            params={"key": self.api_key, "alt": "sse"},
+            json=self._build_payload(prompt)
+        ) as response:
+            response.raise_for_status()
             
-            raise ValueError("Unexpected response format from Gemini")
+            usage = None
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                
+                data = json.loads(line[len("data:"):].strip())
+                # Every chunk repeats the running totals; the last one covers the whole response
+                usage = TokenUsage.from_gemini(data.get("usageMetadata")) or usage
+                for candidate in data.get("candidates", [])[:1]:
+                    for part in candidate.get("content", {}).get("parts", []):
+                        # Skip thought summaries, only stream answer text
+                        if part.get("text") and not part.get("thought"):
+                            yield LLMResult(part["text"])
+        
+        if usage:
+            yield LLMResult("", usage)
     
     def get_model_info(self) -> Dict[str, Any]:
         """Get model information"""
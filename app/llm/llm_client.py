@@ -1,6 +1,48 @@
 # app/llm/llm_client.py
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, AsyncIterator, Optional
+
+
+@dataclass
+class TokenUsage:
+    """Token counts reported by the model for one call"""
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    thinking_tokens: int = 0
+    total_tokens: int = 0
+    
+    @classmethod
+    def from_gemini(cls, usage_metadata: Optional[Dict[str, Any]]) -> Optional["TokenUsage"]:
+        """Parse Gemini usageMetadata (promptTokenCount, candidatesTokenCount, thoughtsTokenCount, totalTokenCount)"""
+        if not usage_metadata:
+            return None
+        prompt = usage_metadata.get("promptTokenCount", 0)
+        output = usage_metadata.get("candidatesTokenCount", 0)
+        thinking = usage_metadata.get("thoughtsTokenCount", 0)
+        return cls(
+            prompt_tokens=prompt,
+            output_tokens=output,
+            thinking_tokens=thinking,
+            total_tokens=usage_metadata.get("totalTokenCount", prompt + output + thinking)
+        )
+    
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> Optional["TokenUsage"]:
+        if not data:
+            return None
+        return cls(**{key: data.get(key, 0) for key in ("prompt_tokens", "output_tokens", "thinking_tokens", "total_tokens")})
+    
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+@dataclass
+class LLMResult:
+    """Generated text and, when the model reports it, its token usage"""
+    text: str
+    usage: Optional[TokenUsage] = None
+
 
 class LLMClient(ABC):
     """Abstract base class for LLM clients"""
@@ -10,7 +52,45 @@ class LLMClient(ABC):
         """Generate response from LLM"""
         pass
     
+    async def complete(self, prompt: str) -> LLMResult:
+        """
+        Generate a response with its token usage
+        
+        Clients that do not report usage return the text with usage None.
+        """
+        return LLMResult(await self.generate(prompt))
+    
+    async def generate_stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Stream response text chunks from LLM
+        
+        Clients without native streaming yield the full response as one chunk.
+        """
+        yield await self.generate(prompt)
+    
+    async def complete_stream(self, prompt: str) -> AsyncIterator[LLMResult]:
+        """
+        Stream response chunks with token usage
+        
+        Usage, when reported, covers the whole response and is carried by the
+        last chunk (whose text may be empty); earlier chunks have usage None.
+        """
+        async for text in self.generate_stream(prompt):
+            yield LLMResult(text)
+    
     @abstractmethod
     def get_model_info(self) -> Dict[str, Any]:
         """Get model information"""
         pass
+    
+    async def start(self):
+        """Open long-lived resources (e.g. HTTP connection pools)"""
+        pass
+    
+    async def aclose(self):
+        """Release long-lived resources"""
+        pass
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool statistics"""
+        return {}
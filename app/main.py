@@ -1,11 +1,15 @@
 # app/main.py
+import asyncio
 from fastapi import FastAPI
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import config
 from app.llm.gemini_client import GeminiClient
 from app.services.rag_service import RAGService
 from app.controllers import chat_controller
+from app.utils.analytics import analytics
+from app.utils import metrics
 
 # Initialize FastAPI app with comprehensive OpenAPI metadata
 app = FastAPI(
@@ -108,6 +112,34 @@ rag_service = RAGService(llm_client)
 chat_controller.set_rag_service(rag_service)
 app.include_router(chat_controller.router)
 
+# Background tasks started with the app
+background_tasks = []
+
+@app.on_event("startup")
+async def startup():
+    """Open shared HTTP clients and start background maintenance tasks"""
+    await llm_client.start()
+    await rag_service.doc_fetcher.start()
+    background_tasks.append(
+        asyncio.create_task(rag_service.watch_knowledge_base(config.KB_RELOAD_INTERVAL))
+    )
+    background_tasks.append(
+        asyncio.create_task(rag_service.cache_service.run_sweeper(config.CACHE_SWEEP_INTERVAL))
+    )
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop background tasks, close shared HTTP clients and flush analytics"""
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+    await llm_client.aclose()
+    await rag_service.doc_fetcher.aclose()
+    rag_service.doc_fetcher.page_store.close()
+    rag_service.cache_service.close()
+    analytics.close()
+
 @app.get("/", tags=["General"])
 async def root():
     """
@@ -134,6 +166,16 @@ async def root():
         }
     }
 
+@app.get("/metrics", tags=["Health"])
+async def prometheus_metrics():
+    """
+    Prometheus Metrics
+    
+    Per-stage and per-endpoint latency histograms, cache hit/miss counters and
+    in-flight request gauges in the Prometheus text format.
+    """
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host=config.HOST, port=config.PORT)
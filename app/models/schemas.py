@@ -1,6 +1,6 @@
 # app/models/schemas.py
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class ChatMessage(BaseModel):
     """Single message in conversation history"""
@@ -12,12 +12,14 @@ class ChatRequest(BaseModel):
     question: str = Field(..., example="How do I search for hotels?")
     conversation_id: Optional[str] = Field(None, example="conv-123")
     history: Optional[List[ChatMessage]] = Field(default_factory=list)
+    include_timings: bool = Field(False, example=False)  # Return per-stage latency breakdown
 
 class ExplainRequest(BaseModel):
     """Request model for explain endpoint"""
     input_type: str = Field(..., example="error_code")
     content: str = Field(..., example="Error 4004: The hotel you selected is sold out")
     client_id: Optional[str] = Field(None, example="client-123")
+    include_timings: bool = Field(False, example=False)  # Return per-stage latency breakdown
 
 class Source(BaseModel):
     """Source document information"""
@@ -31,9 +33,11 @@ class ChatResponse(BaseModel):
     answer: str
     confidence: str
     sources: List[Source]
-    tokens_used: Optional[int] = None
+    tokens_used: Optional[int] = None  # LLM tokens spent on this request (0 when the answer was reused)
     latency_ms: Optional[int] = None
     service_used: Optional[str] = "gemini_2.5_pro"
+    cache_tier: Optional[str] = None  # exact, normalized or semantic when served from cache
+    timings: Optional[Dict[str, float]] = None  # Stage -> milliseconds, when requested
 
 class ExplainResponse(BaseModel):
     """Response model for explain endpoint"""
@@ -42,6 +46,8 @@ class ExplainResponse(BaseModel):
     recommended_actions: List[str]
     sources: List[Source]
     confidence: str
+    tokens_used: Optional[int] = None  # LLM tokens spent on this request (0 when the answer was reused)
+    timings: Optional[Dict[str, float]] = None  # Stage -> milliseconds, when requested
 
 class FeedbackRequest(BaseModel):
     """Request model for feedback endpoint"""
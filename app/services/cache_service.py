@@ -1,10 +1,17 @@
 # app/services/cache_service.py
-import json
+import asyncio
 import hashlib
 import time
 from typing import Dict, Any, Optional
 from pathlib import Path
 
+from app.config import config
+from app.utils.lru_cache import BoundedTTLCache
+from app.services.cache_store import CacheStore, SQLiteCacheStore, JSONFileCacheStore
+from app.services.semantic_cache import SemanticQuestionIndex, normalize_question
+from app.services.vector_store import HashingEmbedder
+from app.utils.metrics import CACHE_LOOKUPS
+
 class CacheService:
     """Hybrid caching service for responses and documentation"""
     
@@ -15,88 +22,174 @@ class CacheService:
         # Cache settings
         self.response_cache_ttl = 3600  # 1 hour for responses
         self.doc_cache_ttl = 1800       # 30 minutes for documentation
+        self.explain_cache_ttl = 86400  # 24 hours for error explanations (error codes rarely change)
         
-        # Cache files
+        # Legacy JSON cache files
         self.response_cache_file = self.cache_dir / "responses.json"
         self.doc_cache_file = self.cache_dir / "documentation.json"
         
-        # Load existing caches
-        self.response_cache = self._load_cache(self.response_cache_file)
-        self.doc_cache = self._load_cache(self.doc_cache_file)
+        # Bounded in-memory tiers (LRU by entry count and total bytes)
+        self.response_cache = BoundedTTLCache(
+            max_entries=config.RESPONSE_CACHE_MAX_ENTRIES,
+            max_bytes=config.RESPONSE_CACHE_MAX_BYTES
+        )
+        self.doc_cache = BoundedTTLCache(
+            max_entries=config.DOC_CACHE_MAX_ENTRIES,
+            max_bytes=config.DOC_CACHE_MAX_BYTES
+        )
+        
+        # Persistent stores - entries are loaded lazily into memory on first lookup
+        self.backend = config.CACHE_BACKEND
+        self.response_store = self._create_store(
+            "responses", self.response_cache_file,
+            lambda entry: self._response_ttl(entry.get('input_type', 'question')),
+            label_for=self._question_label
+        )
+        self.doc_store = self._create_store(
+            "documentation", self.doc_cache_file,
+            lambda entry: self.doc_cache_ttl
+        )
+        self.store_hits = 0
         
-        print("✓ Cache Service initialized - Hybrid mode enabled")
+        # Near-duplicate index over cached questions, seeded on first use
+        self.question_index = SemanticQuestionIndex(
+            HashingEmbedder(dim=config.VECTOR_DIM),
+            threshold=config.RESPONSE_CACHE_SEMANTIC_THRESHOLD,
+            max_entries=config.RESPONSE_CACHE_MAX_ENTRIES
+        )
+        self._questions_indexed = False
+        self.tier_hits = {"exact": 0, "normalized": 0, "semantic": 0}
+        
+        print(f"✓ Cache Service initialized - Hybrid mode enabled ({self.backend} backend)")
     
-    def _load_cache(self, cache_file: Path) -> Dict[str, Any]:
-        """Load cache from file"""
-        try:
-            if cache_file.exists():
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"Warning: Could not load cache {cache_file}: {e}")
-        return {}
+    def _create_store(self, name: str, legacy_file: Path, ttl_for, label_for=None) -> CacheStore:
+        """Create the configured persistent store, importing the legacy JSON file once"""
+        if self.backend == "json":
+            return JSONFileCacheStore(str(legacy_file), ttl_for, label_for)
+        
+        store = SQLiteCacheStore(str(self.cache_dir / "cache.db"), name, label_for)
+        if store.is_empty() and legacy_file.exists():
+            legacy = JSONFileCacheStore(str(legacy_file), ttl_for)
+            store.put_many(legacy.iter_entries())
+            if not store.is_empty():
+                print(f"✓ Imported {store.count()} entries from {legacy_file}")
+        return store
     
-    def _save_cache(self, cache_data: Dict[str, Any], cache_file: Path):
-        """Save cache to file"""
+    def _lookup(self, cache: BoundedTTLCache, store: CacheStore, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Look up the memory tier, falling back to (and promoting from) the persistent store"""
+        entry = cache.get(cache_key)
+        if entry is not None:
+            return entry
+        
+        found = store.get(cache_key)
+        if found is None:
+            return None
+        
+        entry, expires_at = found
+        cache.set(cache_key, entry, 0, expires_at=expires_at)
+        self.store_hits += 1
+        return entry
+    
+    def _store(self, cache: BoundedTTLCache, store: CacheStore, cache_key: str, entry: Dict[str, Any], ttl: int):
+        """Write an entry to the memory tier and the persistent store"""
+        expires_at = entry['timestamp'] + ttl
+        cache.set(cache_key, entry, ttl, expires_at=expires_at)
         try:
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, indent=2, ensure_ascii=False)
+            store.put(cache_key, entry, expires_at)
         except Exception as e:
-            print(f"Warning: Could not save cache {cache_file}: {e}")
+            print(f"Warning: Could not persist cache entry: {e}")
     
     def _generate_key(self, content: str) -> str:
         """Generate cache key from content"""
         return hashlib.md5(content.encode('utf-8')).hexdigest()
     
-    def _is_expired(self, timestamp: float, ttl: int) -> bool:
-        """Check if cache entry is expired"""
-        return time.time() - timestamp > ttl
+    def _response_key(self, question: str, input_type: str) -> str:
+        """Questions are keyed on their normalized form so trivial rewordings share an entry"""
+        if input_type == "question":
+            return self._generate_key(f"{input_type}:{normalize_question(question)}")
+        return self._generate_key(f"{input_type}:{question}")
+    
+    @staticmethod
+    def _question_label(entry: Dict[str, Any]) -> str:
+        """Normalized question stored next to question entries, so the index is seeded without decoding them"""
+        if entry.get('input_type', 'question') != "question":
+            return ""
+        return normalize_question(entry.get('question', ''))
+    
+    def _ensure_question_index(self):
+        """Seed the near-duplicate index from persisted questions (oldest first) on first use"""
+        if self._questions_indexed:
+            return
+        self._questions_indexed = True
+        rows = sorted(self.response_store.iter_index(), key=lambda row: row[2])
+        for cache_key, normalized, _ in rows:
+            if normalized:
+                self.question_index.add(cache_key, normalized)
+    
+    def _response_ttl(self, input_type: str) -> int:
+        """TTL for a response cache entry of the given input type"""
+        if input_type == "explain":
+            return self.explain_cache_ttl
+        return self.response_cache_ttl
     
     def get_response(self, question: str, input_type: str = "question") -> Optional[Dict[str, Any]]:
-        """Get cached response"""
-        cache_key = self._generate_key(f"{input_type}:{question}")
-        
-        if cache_key in self.response_cache:
-            entry = self.response_cache[cache_key]
-            if not self._is_expired(entry['timestamp'], self.response_cache_ttl):
-                print(f"🚀 Cache HIT - Response found for: {question[:50]}...")
-                return entry['data']
-            else:
-                # Remove expired entry
-                del self.response_cache[cache_key]
-                print(f"⏰ Cache EXPIRED - Removing old response")
+        """
+        Get cached response
+        
+        Questions are matched exactly, then on their normalized form, then against
+        near-duplicate cached questions. The returned copy reports the matching
+        tier in "cache_tier".
+        """
+        cache_key = self._response_key(question, input_type)
         
+        entry = self._lookup(self.response_cache, self.response_store, cache_key)
+        if entry:
+            tier = "exact" if entry.get('question') == question else "normalized"
+        elif input_type == "question":
+            tier = "semantic"
+            self._ensure_question_index()
+            match = self.question_index.find(normalize_question(question))
+            if match:
+                entry = self._lookup(self.response_cache, self.response_store, match[0])
+                if entry is None:
+                    self.question_index.remove(match[0])
+        
+        if entry:
+            self.tier_hits[tier] += 1
+            CACHE_LOOKUPS.inc(cache="response", result=tier)
+            print(f"🚀 Cache HIT ({tier}) - Response found for: {question[:50]}...")
+            return {**entry['data'], 'cache_tier': tier}
+        
+        CACHE_LOOKUPS.inc(cache="response", result="miss")
         print(f"❌ Cache MISS - No cached response found")
         return None
     
     def set_response(self, question: str, response_data: Dict[str, Any], input_type: str = "question"):
         """Cache response"""
-        cache_key = self._generate_key(f"{input_type}:{question}")
+        cache_key = self._response_key(question, input_type)
         
-        self.response_cache[cache_key] = {
+        self._store(self.response_cache, self.response_store, cache_key, {
             'timestamp': time.time(),
             'question': question,
             'input_type': input_type,
             'data': response_data
-        }
-        
-        self._save_cache(self.response_cache, self.response_cache_file)
+        }, self._response_ttl(input_type))
+        if input_type == "question":
+            self._ensure_question_index()
+            self.question_index.add(cache_key, normalize_question(question))
         print(f"💾 Cached response for: {question[:50]}...")
     
     def get_documentation(self, query: str) -> Optional[Dict[str, Any]]:
         """Get cached documentation"""
         cache_key = self._generate_key(query)
         
-        if cache_key in self.doc_cache:
-            entry = self.doc_cache[cache_key]
-            if not self._is_expired(entry['timestamp'], self.doc_cache_ttl):
-                print(f"📚 Doc Cache HIT - Documentation found for: {query[:50]}...")
-                return entry['data']
-            else:
-                # Remove expired entry
-                del self.doc_cache[cache_key]
-                print(f"⏰ Doc Cache EXPIRED - Removing old documentation")
+        entry = self._lookup(self.doc_cache, self.doc_store, cache_key)
+        if entry:
+            CACHE_LOOKUPS.inc(cache="documentation", result="hit")
+            print(f"📚 Doc Cache HIT - Documentation found for: {query[:50]}...")
+            return entry['data']
         
+        CACHE_LOOKUPS.inc(cache="documentation", result="miss")
         print(f"📚 Doc Cache MISS - No cached documentation found")
         return None
     
@@ -104,47 +197,65 @@ class CacheService:
         """Cache documentation"""
         cache_key = self._generate_key(query)
         
-        self.doc_cache[cache_key] = {
+        self._store(self.doc_cache, self.doc_store, cache_key, {
             'timestamp': time.time(),
             'query': query,
             'data': doc_data
-        }
-        
-        self._save_cache(self.doc_cache, self.doc_cache_file)
+        }, self.doc_cache_ttl)
         print(f"📚 Cached documentation for: {query[:50]}...")
     
+    def sweep_expired(self) -> int:
+        """Drop expired entries from memory and the persistent stores; returns the number removed"""
+        removed = self.response_cache.sweep_expired() + self.doc_cache.sweep_expired()
+        removed += self.response_store.delete_expired() + self.doc_store.delete_expired()
+        if removed:
+            print(f"🧹 Swept {removed} expired cache entries")
+        return removed
+    
+    async def run_sweeper(self, interval: float):
+        """Periodically sweep expired entries until cancelled (off the event loop - the store DELETEs block)"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.sweep_expired)
+            except Exception as e:
+                print(f"Warning: Cache sweep failed: {e}")
+    
     def clear_cache(self, cache_type: str = "all"):
         """Clear cache"""
         if cache_type in ["all", "responses"]:
             self.response_cache.clear()
-            self._save_cache(self.response_cache, self.response_cache_file)
+            self.response_store.clear()
+            self.question_index.clear()
+            self._questions_indexed = True
             print("🗑️ Response cache cleared")
         
         if cache_type in ["all", "documentation"]:
             self.doc_cache.clear()
-            self._save_cache(self.doc_cache, self.doc_cache_file)
+            self.doc_store.clear()
             print("🗑️ Documentation cache cleared")
     
+    def close(self):
+        """Close the persistent stores"""
+        self.response_store.close()
+        self.doc_store.close()
+    
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
-        current_time = time.time()
-        
-        # Count valid (non-expired) entries
-        valid_responses = sum(1 for entry in self.response_cache.values() 
-                            if not self._is_expired(entry['timestamp'], self.response_cache_ttl))
-        
-        valid_docs = sum(1 for entry in self.doc_cache.values() 
-                        if not self._is_expired(entry['timestamp'], self.doc_cache_ttl))
-        
         return {
+            "backend": self.backend,
+            "store_hits": self.store_hits,
+            "tier_hits": dict(self.tier_hits),
             "response_cache": {
-                "total_entries": len(self.response_cache),
-                "valid_entries": valid_responses,
-                "ttl_seconds": self.response_cache_ttl
+                "total_entries": self.response_store.count(),
+                "ttl_seconds": self.response_cache_ttl,
+                "explain_ttl_seconds": self.explain_cache_ttl,
+                "indexed_questions": len(self.question_index),
+                "memory": self.response_cache.get_stats()
             },
             "doc_cache": {
-                "total_entries": len(self.doc_cache),
-                "valid_entries": valid_docs,
-                "ttl_seconds": self.doc_cache_ttl
+                "total_entries": self.doc_store.count(),
+                "ttl_seconds": self.doc_cache_ttl,
+                "memory": self.doc_cache.get_stats()
             }
-        }
\ No newline at end of file
+        }
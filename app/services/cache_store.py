@@ -0,0 +1,266 @@
+# app/services/cache_store.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, Any, Optional, Iterator, Tuple
+
+# Derives a short label (e.g. the normalized question) from an entry; "" for none
+LabelFunc = Callable[[Dict[str, Any]], str]
+
+
+class CacheStore(ABC):
+    """
+    Persistent key -> entry storage behind the in-memory cache tiers
+
+    Stores created with a label function also keep each entry's label, so
+    iter_index() can list keys and labels without decoding any entry.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Return (entry, expires_at) for a live entry, or None"""
+        pass
+
+    @abstractmethod
+    def put(self, key: str, entry: Dict[str, Any], expires_at: float):
+        """Insert or replace an entry"""
+        pass
+
+    @abstractmethod
+    def delete(self, key: str):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+    @abstractmethod
+    def delete_expired(self) -> int:
+        """Remove expired entries; returns the number removed"""
+        pass
+
+    @abstractmethod
+    def iter_entries(self) -> Iterator[Tuple[str, Dict[str, Any], float]]:
+        """Iterate over live (key, entry, expires_at) tuples"""
+        pass
+
+    @abstractmethod
+    def iter_index(self) -> Iterator[Tuple[str, Optional[str], float]]:
+        """Iterate over live (key, label, expires_at) tuples without decoding entries"""
+        pass
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of live entries"""
+        pass
+
+    def close(self):
+        pass
+
+
+class SQLiteCacheStore(CacheStore):
+    """
+    SQLite store in WAL mode
+
+    Each write is a single-row upsert committed in its own transaction, so
+    writes are O(1) in the cache size and a crash never leaves a torn file.
+    Labels live in their own column (NULL until computed).
+    """
+
+    def __init__(self, db_path: str, table: str, label_for: Optional[LabelFunc] = None):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.table = table
+        self._label_for = label_for
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value TEXT NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_expires ON {table} (expires_at)")
+
+        # Tables created before labels existed gain the column once
+        columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+        if "label" not in columns:
+            self._conn.execute(f"ALTER TABLE {table} ADD COLUMN label TEXT")
+        if label_for:
+            self._backfill_labels()
+
+    def _label(self, entry: Dict[str, Any]) -> Optional[str]:
+        return self._label_for(entry) if self._label_for else None
+
+    def _backfill_labels(self):
+        """Label entries written before labels were stored (decodes only those, once)"""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT key, value FROM {self.table} WHERE label IS NULL").fetchall()
+            if not rows:
+                return
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                f"UPDATE {self.table} SET label = ? WHERE key = ?",
+                ((self._label(json.loads(value)), key) for key, value in rows)
+            )
+            self._conn.execute("COMMIT")
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def put(self, key: str, entry: Dict[str, Any], expires_at: float):
+        value = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, expires_at, value, label) VALUES (?, ?, ?, ?)",
+                (key, expires_at, value, self._label(entry))
+            )
+
+    def put_many(self, rows: Iterator[Tuple[str, Dict[str, Any], float]]):
+        """Insert several entries in one transaction"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (key, expires_at, value, label) VALUES (?, ?, ?, ?)",
+                    ((key, expires_at, json.dumps(entry, ensure_ascii=False), self._label(entry))
+                     for key, entry, expires_at in rows)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+    def delete_expired(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),))
+        return cursor.rowcount
+
+    def iter_entries(self) -> Iterator[Tuple[str, Dict[str, Any], float]]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, value, expires_at FROM {self.table} WHERE expires_at > ?",
+                (time.time(),)
+            ).fetchall()
+        for key, value, expires_at in rows:
+            yield key, json.loads(value), expires_at
+
+    def iter_index(self) -> Iterator[Tuple[str, Optional[str], float]]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, label, expires_at FROM {self.table} WHERE expires_at > ?",
+                (time.time(),)
+            ).fetchall()
+        yield from rows
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT COUNT(*) FROM {self.table} WHERE expires_at > ?", (time.time(),)
+            ).fetchone()[0]
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute(f"SELECT 1 FROM {self.table} LIMIT 1").fetchone() is None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JSONFileCacheStore(CacheStore):
+    """
+    Legacy single-file JSON store
+
+    Keeps every entry in memory and rewrites the whole file on each write,
+    using a temp file and atomic rename so a crash never corrupts it.
+    """
+
+    def __init__(self, file_path: str, ttl_for, label_for: Optional[LabelFunc] = None):
+        self.file_path = Path(file_path)
+        self._ttl_for = ttl_for
+        self._label_for = label_for
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+
+        try:
+            if self.file_path.exists():
+                with open(self.file_path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not load cache {self.file_path}: {e}")
+
+    def _expires_at(self, entry: Dict[str, Any]) -> float:
+        return entry.get('timestamp', 0) + self._ttl_for(entry)
+
+    def _save(self):
+        tmp_path = self.file_path.with_suffix(self.file_path.suffix + ".tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.file_path)
+        except Exception as e:
+            print(f"Warning: Could not save cache {self.file_path}: {e}")
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        entry = self._entries.get(key)
+        if entry is None or self._expires_at(entry) <= time.time():
+            return None
+        return entry, self._expires_at(entry)
+
+    def put(self, key: str, entry: Dict[str, Any], expires_at: float):
+        with self._lock:
+            self._entries[key] = entry
+            self._save()
+
+    def delete(self, key: str):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._save()
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._save()
+
+    def delete_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [key for key, entry in self._entries.items() if self._expires_at(entry) <= now]
+            for key in expired:
+                del self._entries[key]
+            if expired:
+                self._save()
+        return len(expired)
+
+    def iter_entries(self) -> Iterator[Tuple[str, Dict[str, Any], float]]:
+        now = time.time()
+        for key, entry in list(self._entries.items()):
+            if self._expires_at(entry) > now:
+                yield key, entry, self._expires_at(entry)
+
+    def iter_index(self) -> Iterator[Tuple[str, Optional[str], float]]:
+        # Entries are already in memory
+        for key, entry, expires_at in self.iter_entries():
+            yield key, self._label_for(entry) if self._label_for else None, expires_at
+
+    def count(self) -> int:
+        return sum(1 for _ in self.iter_entries())
@@ -0,0 +1,164 @@
+# app/services/chunker.py
+import math
+import re
+from collections import Counter
+from typing import List, Dict, Any, Optional
+
+from bs4 import BeautifulSoup, Comment, Doctype, NavigableString, Tag
+
+from app.services.kb_index import tokenize
+
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4'}
+SKIPPED_TAGS = {'script', 'style', 'noscript', 'svg', 'nav', 'footer', 'head'}
+CHARS_PER_TOKEN = 4
+
+# Question words that carry no signal when ranking chunks of a single page
+QUERY_STOPWORDS = {
+    'a', 'an', 'the', 'and', 'or', 'is', 'are', 'what', 'how', 'do', 'does', 'i', 'to', 'of',
+    'for', 'in', 'on', 'can', 'me', 'my', 'it', 'this', 'with'
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (about 4 characters per token)"""
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "page"
+
+
+def chunk_soup(soup: BeautifulSoup, max_tokens: int) -> List[Dict[str, Any]]:
+    """
+    Split a parsed page into chunks at headings, tables and code blocks
+
+    Each chunk is {id, heading, kind (text/table/code), text, tokens}. The text
+    starts with its heading so chunks stand on their own in a prompt. Ids are
+    derived from the heading and position within it, so they stay stable
+    across re-fetches of an unchanged page.
+    """
+    chunks: List[Dict[str, Any]] = []
+    heading = soup.title.get_text(strip=True) if soup.title else ""
+    lines: List[str] = []
+    counters: Dict[str, int] = {}
+    heading_ids: Counter = Counter()
+    heading_slug = _slug(heading)
+
+    def emit(kind: str, body: str):
+        key = f"{heading_slug}:{kind}"
+        counters[key] = counters.get(key, 0) + 1
+        text = f"{heading}\n{body}" if heading else body
+        chunks.append({
+            "id": f"{key}{counters[key]}",
+            "heading": heading,
+            "kind": kind,
+            "text": text,
+            "tokens": estimate_tokens(text)
+        })
+
+    def flush_text():
+        # Long prose is split on line boundaries so no chunk exceeds max_tokens
+        part: List[str] = []
+        size = 0
+        for line in lines:
+            line_tokens = estimate_tokens(line)
+            if part and size + line_tokens > max_tokens:
+                emit("text", '\n'.join(part))
+                part, size = [], 0
+            part.append(line)
+            size += line_tokens
+        if part:
+            emit("text", '\n'.join(part))
+        lines.clear()
+
+    def walk(node: Tag):
+        nonlocal heading, heading_slug
+        for child in node.children:
+            if isinstance(child, Tag):
+                if child.name in SKIPPED_TAGS:
+                    continue
+                if child.name in HEADING_TAGS:
+                    flush_text()
+                    heading = child.get_text(' ', strip=True)
+                    # Repeated headings (e.g. several "Example" sections) get distinct ids
+                    base = _slug(heading)
+                    heading_ids[base] += 1
+                    heading_slug = base if heading_ids[base] == 1 else f"{base}~{heading_ids[base]}"
+                elif child.name == 'table':
+                    flush_text()
+                    emit("table", child.get_text('\n', strip=True))
+                elif child.name == 'pre':
+                    flush_text()
+                    emit("code", child.get_text().strip('\n'))
+                else:
+                    walk(child)
+            elif isinstance(child, NavigableString) and not isinstance(child, (Comment, Doctype)):
+                text = child.strip()
+                if text:
+                    lines.append(text)
+
+    walk(soup.body or soup)
+    flush_text()
+    return [chunk for chunk in chunks if chunk["text"].strip()]
+
+
+def chunk_html(html: str, max_tokens: int) -> List[Dict[str, Any]]:
+    """Parse HTML and split it into chunks (see chunk_soup)"""
+    return chunk_soup(BeautifulSoup(html, 'html.parser'), max_tokens)
+
+
+def rank_chunks(question: str, chunks: List[Dict[str, Any]], k1: float = 1.5, b: float = 0.75) -> List[float]:
+    """BM25 score of every chunk against the question, with IDF computed over the chunks"""
+    query_tokens = [t for t in tokenize(question) if t not in QUERY_STOPWORDS]
+    if not chunks or not query_tokens:
+        return [0.0] * len(chunks)
+
+    chunk_tf = [Counter(tokenize(chunk["text"])) for chunk in chunks]
+    lengths = [sum(tf.values()) for tf in chunk_tf]
+    avg_length = (sum(lengths) / len(lengths)) or 1.0
+    total = len(chunks)
+
+    scores = [0.0] * total
+    for token in set(query_tokens):
+        containing = sum(1 for tf in chunk_tf if token in tf)
+        if not containing:
+            continue
+        idf = math.log(1 + (total - containing + 0.5) / (containing + 0.5))
+        for i, tf in enumerate(chunk_tf):
+            count = tf.get(token, 0)
+            if count:
+                norm = k1 * (1 - b + b * lengths[i] / avg_length)
+                scores[i] += idf * count * (k1 + 1) / (count + norm)
+    return scores
+
+
+def select_chunks(question: str, chunks: List[Dict[str, Any]], token_budget: int,
+                  scores: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+    """
+    Keep the chunks most relevant to the question within a token budget
+
+    Chunks are taken by descending BM25 score while they fit; if nothing matches,
+    the page is taken from the top. The result keeps document order.
+    """
+    if scores is None:
+        scores = rank_chunks(question, chunks)
+    if not chunks:
+        return []
+
+    matched = any(score > 0 for score in scores)
+    order = sorted(range(len(chunks)), key=lambda i: (-scores[i], i)) if matched else range(len(chunks))
+
+    kept, used = [], 0
+    for i in order:
+        if matched and scores[i] <= 0:
+            break
+        if used + chunks[i]["tokens"] <= token_budget:
+            kept.append(i)
+            used += chunks[i]["tokens"]
+
+    # A single oversized table or code block is truncated rather than dropped
+    if not kept:
+        best = chunks[order[0]]
+        text = best["text"][:token_budget * CHARS_PER_TOKEN]
+        return [{**best, "text": text, "tokens": estimate_tokens(text)}]
+    return [chunks[i] for i in sorted(kept)]
@@ -0,0 +1,102 @@
+# app/services/context_packer.py
+import hashlib
+from typing import List, Dict, Any, Set
+
+from app.services.chunker import CHARS_PER_TOKEN, estimate_tokens
+from app.services.kb_index import tokenize
+
+SHINGLE_SIZE = 3           # Words per shingle for near-duplicate detection
+MIN_PARTIAL_TOKENS = 200   # Smallest leftover budget worth filling with the start of a long section
+
+
+def content_hash(text: str) -> str:
+    """Hash of the text with case and whitespace normalized"""
+    return hashlib.sha1(" ".join(text.lower().split()).encode('utf-8')).hexdigest()
+
+
+def _shingles(tokens: List[str]) -> Set[str]:
+    if len(tokens) <= SHINGLE_SIZE:
+        return {" ".join(tokens)}
+    return {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def pack_context(docs: List[Dict[str, Any]], token_budget: int, max_docs: int,
+                 mmr_lambda: float = 0.7, near_duplicate: float = 0.8) -> List[Dict[str, Any]]:
+    """
+    Choose the context documents sent to the LLM
+
+    docs are {text, metadata} in retrieval order, with the retrieval score (if
+    any) in metadata["score"].
+    1. Exact duplicates (same content hash) and near duplicates (word-shingle
+       Jaccard >= near_duplicate) of a higher-ranked document are dropped.
+    2. Documents are ordered by maximal marginal relevance: normalized score
+       weighted by mmr_lambda, minus similarity (shared vocabulary) to the
+       documents already picked.
+    3. Up to max_docs of them are packed in that order within the token
+       budget. A document that does not fit is truncated to the remaining
+       budget if at least MIN_PARTIAL_TOKENS remain, so its section is still
+       represented.
+
+    docs should be a wider candidate pool than max_docs, so documents dropped
+    as duplicates are replaced by the next distinct ones.
+
+    The result is in pick order, most valuable first.
+    """
+    # Deduplicate, keeping the highest-ranked copy
+    unique, seen, kept_shingles, vocabularies = [], set(), [], []
+    for doc in docs:
+        digest = content_hash(doc["text"])
+        if digest in seen:
+            continue
+        tokens = tokenize(doc["text"].lower())
+        shingles = _shingles(tokens)
+        if any(_jaccard(shingles, other) >= near_duplicate for other in kept_shingles):
+            continue
+        seen.add(digest)
+        kept_shingles.append(shingles)
+        vocabularies.append(set(tokens))
+        unique.append(doc)
+
+    if not unique:
+        return []
+
+    scores = [doc.get("metadata", {}).get("score") for doc in unique]
+    top_score = max((score for score in scores if score), default=0)
+    relevance = [score / top_score if score and top_score else 1.0 for score in scores]
+    tokens_needed = [estimate_tokens(doc["text"]) for doc in unique]
+
+    # Maximal marginal relevance order
+    order: List[int] = []
+    remaining = list(range(len(unique)))
+    while remaining:
+        best = max(remaining, key=lambda i: (
+            mmr_lambda * relevance[i]
+            - (1 - mmr_lambda) * max((_jaccard(vocabularies[i], vocabularies[j]) for j in order), default=0.0)
+        ))
+        remaining.remove(best)
+        order.append(best)
+
+    # Pack within the token budget
+    packed, used, truncated = [], 0, 0
+    for i in order:
+        if len(packed) >= max_docs:
+            break
+        left = token_budget - used
+        if tokens_needed[i] <= left:
+            packed.append(unique[i])
+            used += tokens_needed[i]
+        elif left >= MIN_PARTIAL_TOKENS or not packed:
+            text = unique[i]["text"][:left * CHARS_PER_TOKEN]
+            packed.append({**unique[i], "text": text})
+            used += estimate_tokens(text)
+            truncated += 1
+
+    print(f"🧩 Packed {len(packed)}/{len(docs)} documents "
+          f"({len(docs) - len(unique)} duplicates dropped, {truncated} truncated, ~{used} tokens)")
+    return packed
@@ -0,0 +1,130 @@
+# app/services/crawler.py
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.config import config
+from app.services.chunker import chunk_html
+from app.services.doc_fetcher import DocumentationFetcher
+
+
+class RateLimiter:
+    """Spaces request starts at least 1 / rate seconds apart"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            if self._next_start > now:
+                await asyncio.sleep(self._next_start - now)
+            self._next_start = max(now, self._next_start) + self.interval
+
+
+class DocsCrawler:
+    """
+    Crawls every page known to DocumentationFetcher into a knowledge base snapshot
+
+    Pages are fetched concurrently over the fetcher's pooled client under a
+    request rate limit, split into structure-aware chunks (headings, tables,
+    code blocks) in a process pool, and written
+    as one knowledge base file that KnowledgeBaseIndex picks up on its next
+    reload.
+    """
+
+    def __init__(self, fetcher: DocumentationFetcher, concurrency: int, rate: float,
+                 workers: Optional[int] = None):
+        self.fetcher = fetcher
+        self.concurrency = concurrency
+        self.rate = rate
+        self.workers = workers
+
+    def known_pages(self) -> List[Tuple[str, str, str]]:
+        """(source type, page slug, url) for every page in the keyword maps"""
+        sources = [
+            ("docs", self.fetcher.base_url, self.fetcher.doc_map),
+            ("recipes", self.fetcher.recipes_url, self.fetcher.recipes_map),
+            ("reference", self.fetcher.reference_url, self.fetcher.reference_map)
+        ]
+        pages = []
+        seen = set()
+        for source_type, base_url, keyword_map in sources:
+            for slug in keyword_map.values():
+                url = f"{base_url}/{slug}"
+                if url not in seen:
+                    seen.add(url)
+                    pages.append((source_type, slug, url))
+        return pages
+
+    async def _fetch(self, url: str, semaphore: asyncio.Semaphore, limiter: RateLimiter) -> Optional[str]:
+        async with semaphore:
+            await limiter.wait()
+            try:
+                client = await self.fetcher.get_client()
+                response = await client.get(url)
+                response.raise_for_status()
+                print(f"  ✓ {url}")
+                return response.text
+            except Exception as e:
+                print(f"  ✗ {url}: {e}")
+                return None
+
+    async def crawl(self) -> Dict[str, Any]:
+        """Fetch and parse every known page; returns the snapshot knowledge base"""
+        pages = self.known_pages()
+        print(f"🕷️ Crawling {len(pages)} pages (concurrency {self.concurrency}, {self.rate} req/s)")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        limiter = RateLimiter(self.rate)
+        htmls = await asyncio.gather(*[self._fetch(url, semaphore, limiter) for _, _, url in pages])
+
+        # HTML parsing is CPU bound - spread it over worker processes
+        loop = asyncio.get_running_loop()
+        fetched = [(page, html) for page, html in zip(pages, htmls) if html]
+        parse = partial(chunk_html, max_tokens=config.CHUNK_MAX_TOKENS)
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            parsed = await asyncio.gather(*[
+                loop.run_in_executor(pool, parse, html) for _, html in fetched
+            ])
+
+        snapshot = {}
+        for ((source_type, slug, url), _), chunks in zip(fetched, parsed):
+            page_title = slug.replace('-', ' ').replace('_', ' ').title()
+            for chunk in chunks:
+                heading = chunk["heading"]
+                # Stable chunk ids keep section keys unchanged across re-crawls
+                snapshot[f"{source_type}/{slug}#{chunk['id']}"] = {
+                    "title": f"{page_title} - {heading}" if heading and heading != page_title else page_title,
+                    "url": url,
+                    "source": source_type,
+                    "page": slug,
+                    "kind": chunk["kind"],
+                    "content": chunk["text"]
+                }
+
+        print(f"✓ Crawled {len(fetched)}/{len(pages)} pages into {len(snapshot)} chunks")
+        return snapshot
+
+    @staticmethod
+    def write_snapshot(snapshot: Dict[str, Any], output_path: str):
+        """Write the snapshot atomically so a running server never reads a partial file"""
+        path = Path(output_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        data = {
+            "crawled_at": datetime.utcnow().isoformat(),
+            "documentation": snapshot
+        }
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        print(f"💾 Wrote snapshot to {path}")
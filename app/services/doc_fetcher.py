@@ -1,8 +1,18 @@
 # app/services/doc_fetcher.py
+import asyncio
 import httpx
 import json
-from typing import Dict, Any, Optional
+import os
+from typing import Dict, Any, List, Optional, Tuple
 from bs4 import BeautifulSoup
+from app.config import config
+from app.utils.http_client import create_async_client, get_pool_stats
+from app.utils.single_flight import SingleFlight
+from app.services.keyword_router import KeywordRouter, SourceRules
+from app.services.page_store import PageStore
+from app.services.chunker import chunk_soup
+from app.services.error_catalog import extract_error_code
+from app.utils.metrics import stage, CACHE_LOOKUPS
 
 class DocumentationFetcher:
     """Fetches documentation from ZentrumHub docs website"""
@@ -264,8 +274,160 @@ class DocumentationFetcher:
             "location-suggest": "get_api-hotel-autosuggest",
             "autocomplete": "get_api-hotel-autosuggest"
         }
+        
+        # Keyword maps compiled once into a single matcher
+        self.keyword_router = self._build_keyword_router()
+        
+        # Shared pooled client - opened at app startup, closed at shutdown
+        self._client: Optional[httpx.AsyncClient] = None
+        
+        # Extracted page text, shared by all queries routed to the same URL
+        self.page_store = PageStore(
+            config.PAGE_STORE_PATH,
+            fresh_seconds=config.PAGE_STORE_FRESH_SECONDS,
+            ttl_seconds=config.PAGE_STORE_TTL
+        )
+        
+        # Concurrent fetches for the same query share one request
+        self.single_flight = SingleFlight()
+    
+    def _build_keyword_router(self) -> KeywordRouter:
+        """Scoring rules for the docs, recipes and reference keyword maps"""
+        def cancel_booking_boost(keyword: str, query_lower: str) -> int:
+            # High boost for cancel booking queries
+            if keyword == "cancel-booking" and "cancel" in query_lower and "booking" in query_lower:
+                return 50
+            return 0
+        
+        def recipe_phrase_boost(keyword: str, query_lower: str) -> int:
+            boost = cancel_booking_boost(keyword, query_lower)
+            # Very high boost for specific field queries
+            if "isincludedinbaserate" in keyword.lower() and "isincludedinbaserate" in query_lower.replace(" ", ""):
+                boost += 60
+            return boost
+        
+        cancel_terms = ['cancel', 'cancellation', 'refund']
+        
+        return KeywordRouter([
+            SourceRules(
+                "docs", self.doc_map,
+                phrase_score=20, word_score=10, any_word_score=5,
+                phrase_boost=cancel_booking_boost,
+                page_boosts=[("cancel-api", cancel_terms, 30)]
+            ),
+            SourceRules(
+                "recipes", self.recipes_map,
+                phrase_score=20, word_score=10, any_word_score=5,
+                phrase_boost=recipe_phrase_boost,
+                page_boosts=[
+                    ("cancel-booking", cancel_terms, 30),
+                    # Field queries prioritize recipes over docs
+                    ("search-results", ['isincludedinbaserate', 'field', 'what is', 'define'], 40)
+                ]
+            ),
+            # Reference pages: highest priority for field/request details
+            SourceRules(
+                "reference", self.reference_map,
+                phrase_score=30, word_score=15, any_word_score=8,
+                page_boosts=[(None, ['field', 'request', 'body', 'parameter', 'schema', 'format', 'how to', 'create', 'send'], 25)]
+            )
+        ])
+    
+    async def start(self):
+        """Open the shared HTTP client"""
+        if self._client is None or self._client.is_closed:
+            self._client = create_async_client(
+                max_connections=config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+                connect_timeout=config.DOCS_CONNECT_TIMEOUT,
+                read_timeout=config.DOCS_READ_TIMEOUT,
+                http2=config.HTTP2_ENABLED
+            )
+    
+    async def aclose(self):
+        """Close the shared HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def get_client(self) -> httpx.AsyncClient:
+        """Shared client, opened lazily when used outside the app lifecycle"""
+        await self.start()
+        return self._client
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool statistics"""
+        return get_pool_stats(self._client)
+    
+    @staticmethod
+    def _parse_page(html: str) -> Tuple[str, List[Dict[str, Any]]]:
+        """Full text and structure-aware chunks of an HTML page (CPU bound - run in a thread)"""
+        soup = BeautifulSoup(html, 'html.parser')
+        return soup.get_text(separator='\n', strip=True), chunk_soup(soup, config.CHUNK_MAX_TOKENS)
+    
+    async def _get_page(self, url: str) -> Dict[str, Any]:
+        """
+        Stored page {url, text, chunks, ...} for a documentation URL
+        
+        Fresh stored pages are returned directly; stale ones are revalidated with a
+        conditional GET and only re-downloaded and re-parsed when they changed.
+        Raises httpx.HTTPStatusError for error responses.
+        """
+        stored = self.page_store.get(url)
+        if stored and 'chunks' not in stored:
+            # Stored before pages were chunked - download and parse it again
+            stored = None
+        if stored and self.page_store.is_fresh(stored):
+            self.page_store.fresh_hits += 1
+            CACHE_LOOKUPS.inc(cache="page", result="fresh")
+            return stored
+        
+        client = await self.get_client()
+        with stage("live_fetch"):
+            response = await client.get(url, headers=self.page_store.conditional_headers(stored))
+        
+        if response.status_code == 304 and stored:
+            print(f"  ↺ Not modified: {url}")
+            CACHE_LOOKUPS.inc(cache="page", result="revalidated")
+            return self.page_store.mark_revalidated(stored)
+        response.raise_for_status()
+        CACHE_LOOKUPS.inc(cache="page", result="miss")
+        
+        # Parse HTML content off the event loop
+        with stage("html_parse"):
+            text, chunks = await asyncio.to_thread(self._parse_page, response.text)
+        return self.page_store.put(url, text, chunks, response.headers.get('etag'), response.headers.get('last-modified'))
+    
+    async def _fetch_error_page(self, page: str, error_code: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Fetch one API page and keep it only if it documents error codes"""
+        url = f"{self.base_url}/{page}"
+        try:
+            stored = await self._get_page(url)
+        except httpx.HTTPStatusError:
+            return None
+        except Exception as e:
+            print(f"  ✗ Error fetching {page}: {e}")
+            return None
+        
+        # Check if this page has error codes
+        content = stored['text']
+        content_lower = content.lower()
+        if 'error' in content_lower and ('code' in content_lower or (error_code and error_code in content)):
+            print(f"  ✓ Found error codes in {page}")
+            return {
+                "page": page,
+                "url": url,
+                "content": content,
+                "chunks": stored['chunks']
+            }
+        return None
     
     async def fetch_documentation(self, query: str) -> Optional[Dict[str, Any]]:
+        """Fetch documentation, sharing one fetch between concurrent identical queries"""
+        return await self.single_flight.do(query, lambda: self._fetch_documentation(query))
+    
+    async def _fetch_documentation(self, query: str) -> Optional[Dict[str, Any]]:
         """
         Fetch documentation based on query keywords with improved scoring
         Now searches 3 sources: /reference/ (API specs), /docs/ (guides), /recipes/ (workflows)
@@ -278,14 +440,9 @@ class DocumentationFetcher:
         """
         # Find relevant doc page with scoring
         query_lower = query.lower()
-        query_words = query_lower.split()
         
         # Extract error code if present (e.g., "401", "4004", "5000")
-        error_code = None
-        for word in query_words:
-            if word.isdigit() and len(word) in [3, 4]:
-                error_code = word
-                break
+        error_code = extract_error_code(query)
         
         # If error code detected, search all API pages for error codes
         if error_code or 'error' in query_lower:
@@ -300,114 +457,52 @@ class DocumentationFetcher:
                 "direct-rooms-and-rates"
             ]
             
-            # Fetch all error pages and combine
-            all_content = []
-            for page in error_pages:
-                try:
-                    url = f"{self.base_url}/{page}"
-                    async with httpx.AsyncClient() as client:
-                        response = await client.get(url, timeout=10.0)
-                        if response.status_code == 200:
-                            soup = BeautifulSoup(response.text, 'html.parser')
-                            content = soup.get_text(separator='\n', strip=True)
-                            
-                            # Check if this page has error codes
-                            if 'error' in content.lower() and ('code' in content.lower() or error_code in content):
-                                all_content.append({
-                                    "page": page,
-                                    "url": url,
-                                    "content": content
-                                })
-                                print(f"  ✓ Found error codes in {page}")
-                except:
-                    continue
+            # Fetch all error pages concurrently under one deadline
+            tasks = [
+                asyncio.create_task(self._fetch_error_page(page, error_code))
+                for page in error_pages
+            ]
+            done, pending = await asyncio.wait(tasks, timeout=config.DOCS_BATCH_DEADLINE)
+            
+            # Keep whatever finished in time - partial results are still useful
+            for task in pending:
+                task.cancel()
+            if pending:
+                print(f"  ⏰ {len(pending)} error pages missed the {config.DOCS_BATCH_DEADLINE}s deadline")
+            
+            all_content = [
+                task.result() for task in tasks
+                if task in done and task.result()
+            ]
             
             if all_content:
                 # Combine all error documentation
                 combined_content = "\n\n=== ERROR CODES FROM MULTIPLE APIs ===\n\n"
+                combined_chunks = []
                 urls = []
                 for doc in all_content:
                     combined_content += f"\n--- {doc['page']} ---\n{doc['content']}\n"
+                    # Chunks are labelled with their page so they can be ranked together
+                    combined_chunks.extend(
+                        {**chunk, "id": f"{doc['page']}/{chunk['id']}", "text": f"[{doc['page']}] {chunk['text']}"}
+                        for chunk in doc['chunks']
+                    )
                     urls.append(doc['url'])
                 
                 return {
                     "title": "ZentrumHub API Error Codes",
                     "url": urls[0] if urls else f"{self.base_url}/roomrates-api",
                     "content": combined_content,
+                    "chunks": combined_chunks,
                     "source": "live_docs",
                     "score": 100
                 }
         
-        # Regular keyword matching for non-error queries
-        doc_scores = {}
-        recipe_scores = {}
-        reference_scores = {}
-        
-        # Score docs pages
-        for keyword, page in self.doc_map.items():
-            score = 0
-            if keyword in query_lower:
-                score += 20
-                # Boost score for exact phrase matches
-                if keyword == "cancel-booking" and "cancel" in query_lower and "booking" in query_lower:
-                    score += 50  # High boost for cancel booking queries
-            for word in query_words:
-                if keyword in word or word in keyword:
-                    score += 10
-            if any(keyword in word for word in query_words):
-                score += 5
-            
-            # Special boost for cancel-related queries
-            if page == "cancel-api" and any(term in query_lower for term in ['cancel', 'cancellation', 'refund']):
-                score += 30
-                
-            if score > 0:
-                doc_scores[page] = doc_scores.get(page, 0) + score
-        
-        # Score recipes pages
-        for keyword, page in self.recipes_map.items():
-            score = 0
-            if keyword in query_lower:
-                score += 20
-                # Boost score for exact phrase matches
-                if keyword == "cancel-booking" and "cancel" in query_lower and "booking" in query_lower:
-                    score += 50  # High boost for cancel booking queries
-                # Boost score for field-specific queries
-                if "isincludedinbaserate" in keyword.lower() and "isincludedinbaserate" in query_lower.replace(" ", ""):
-                    score += 60  # Very high boost for specific field queries
-            for word in query_words:
-                if keyword in word or word in keyword:
-                    score += 10
-            if any(keyword in word for word in query_words):
-                score += 5
-                
-            # Special boost for cancel-related queries in recipes
-            if page == "cancel-booking" and any(term in query_lower for term in ['cancel', 'cancellation', 'refund']):
-                score += 30
-                
-            # Special boost for field-related queries - prioritize recipes over docs
-            if any(field_term in query_lower for field_term in ['isincludedinbaserate', 'field', 'what is', 'define']):
-                if page == "search-results":
-                    score += 40  # High boost for field queries in search-results
-                
-            if score > 0:
-                recipe_scores[page] = recipe_scores.get(page, 0) + score
-        
-        # Score reference pages (HIGHEST PRIORITY for field/request details)
-        for keyword, page in self.reference_map.items():
-            score = 0
-            if keyword in query_lower:
-                score += 30  # Higher base score for reference
-            for word in query_words:
-                if keyword in word or word in keyword:
-                    score += 15  # Higher word match score
-            if any(keyword in word for word in query_words):
-                score += 8
-            # Boost score for field/request/schema related queries
-            if any(term in query_lower for term in ['field', 'request', 'body', 'parameter', 'schema', 'format', 'how to', 'create', 'send']):
-                score += 25
-            if score > 0:
-                reference_scores[page] = reference_scores.get(page, 0) + score
+        # Regular keyword matching for non-error queries - one pass over the query
+        scores = self.keyword_router.score(query)
+        doc_scores = scores["docs"]
+        recipe_scores = scores["recipes"]
+        reference_scores = scores["reference"]
         
         # Determine best match (reference > recipes > docs)
         best_doc_score = max(doc_scores.values()) if doc_scores else 0
@@ -439,23 +534,16 @@ class DocumentationFetcher:
         try:
             print(f"📄 Fetching from {source_type}: {url} (score: {score})")
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, timeout=10.0)
-                response.raise_for_status()
-                
-                # Parse HTML content
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Extract text content
-                content = soup.get_text(separator='\n', strip=True)
-                
-                return {
-                    "title": doc_page.replace('-', ' ').replace('_', ' ').title(),
-                    "url": url,
-                    "content": content,
-                    "source": f"live_{source_type}",
-                    "score": score
-                }
+            page = await self._get_page(url)
+            
+            return {
+                "title": doc_page.replace('-', ' ').replace('_', ' ').title(),
+                "url": url,
+                "content": page['text'],
+                "chunks": page['chunks'],
+                "source": f"live_{source_type}",
+                "score": score
+            }
         except Exception as e:
             print(f"Error fetching documentation: {e}")
             return None
@@ -486,9 +574,12 @@ class DocumentationFetcher:
                 "last_updated": "auto"
             }
             
-            # Save updated knowledge base
-            with open(filename, 'w', encoding='utf-8') as f:
+            # Save updated knowledge base (atomic rename so the index watcher
+            # never reads a half-written file)
+            tmp_filename = f"{filename}.tmp"
+            with open(tmp_filename, 'w', encoding='utf-8') as f:
                 json.dump(kb, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_filename, filename)
             
             print(f"✓ Saved {doc_data['title']} to knowledge base")
             return True
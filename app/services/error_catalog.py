@@ -0,0 +1,191 @@
+# app/services/error_catalog.py
+import json
+import os
+import re
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterable
+
+# Scraped doc pages render the table as "Error Codes\nError Code\nError Message\n<code>\n<message>..."
+ERROR_TABLE_HEADER = "Error Codes\nError Code\nError Message\n"
+ERROR_CODE_LINE = re.compile(r"^\d{3,4}$")
+
+SNIPPET_LENGTH = 300
+
+# Text whose 3-4 digit numbers are not error codes
+NON_CODE_PATTERNS = [
+    re.compile(r"https?://\S+"),                                                    # URLs
+    re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b"),  # UUIDs
+    re.compile(r"\b\d{4}-\d{2}-\d{2}(?:[t ][\d:.]+z?)?"),                            # dates, with or without a time
+    re.compile(r"\b\d{1,2}:\d{2}(?::\d{2})?(?:\.\d+)?"),                              # times
+]
+
+# Volatile parts of error payloads, stripped before explanations are cached
+VOLATILE_PATTERNS = NON_CODE_PATTERNS + [
+    re.compile(r"(?:/[\w.{}-]+){2,}/?"),                                              # paths
+    re.compile(r"\b(?=[0-9a-f]*\d)[0-9a-f]{8,}\b"),                                  # hex ids / hashes
+    re.compile(r"\b\d{5,}\b"),                                                        # numeric ids
+]
+LABELLED_CODE = re.compile(r"\b(?:error[\s_-]?code|code|error)\W{0,3}(\d{3,4})\b")
+STATUS_CODE = re.compile(r"\b(?:status[\s_-]?code|status|http)\W{0,3}(\d{3})\b")
+CODE_NUMBER = re.compile(r"\b\d{3,4}\b")
+
+
+def extract_error_code(text: str) -> Optional[str]:
+    """
+    Error code mentioned in a question or error payload (catalog lookup key)
+
+    A number labelled as the code ("code": 1005, Error 4004, errorCode=4001)
+    wins. Otherwise the first 3-4 digit number that is not part of a date,
+    time, URL or UUID and not labelled as an HTTP status ("status": 400);
+    a lone HTTP status is the code only when nothing else is found.
+    """
+    text = text.lower()
+    for pattern in NON_CODE_PATTERNS:
+        text = pattern.sub(" ", text)
+
+    labelled = LABELLED_CODE.search(text)
+    if labelled:
+        return labelled.group(1)
+
+    statuses = [match.start(1) for match in STATUS_CODE.finditer(text)]
+    numbers = [match for match in CODE_NUMBER.finditer(text)]
+    code = next((match.group() for match in numbers if match.start() not in statuses), None)
+    return code or (numbers[0].group() if numbers else None)
+
+
+class ErrorCatalog:
+    """Pre-parsed error code -> message/owning API/context lookup table"""
+
+    def __init__(self, entries: Optional[Dict[str, Dict[str, Any]]] = None, fingerprint: Optional[str] = None):
+        self.entries: Dict[str, Dict[str, Any]] = entries or {}
+        self.fingerprint = fingerprint
+
+    def get(self, code: Optional[str]) -> Optional[Dict[str, Any]]:
+        """O(1) lookup of an error code"""
+        if not code:
+            return None
+        return self.entries.get(code)
+
+    def _add(self, code: str, message: str, api: str, source: str, snippet: str):
+        """Record one occurrence of an error code"""
+        code = str(code).strip()
+        message = str(message).strip()
+        if not ERROR_CODE_LINE.match(code) or not message:
+            return
+
+        entry = self.entries.setdefault(code, {
+            "code": code,
+            "message": message,
+            "apis": [],
+            "contexts": []
+        })
+        if api not in entry["apis"]:
+            entry["apis"].append(api)
+
+        # Same API documenting the same message in several files counts once
+        if any(c["api"] == api and c["message"] == message for c in entry["contexts"]):
+            return
+        entry["contexts"].append({
+            "api": api,
+            "message": message,
+            "source": source,
+            "snippet": snippet[:SNIPPET_LENGTH]
+        })
+
+    def _add_structured(self, error_codes: Any, api: str, source: str, snippet: str):
+        """Parse "error_codes" as a list of {code, message} or a {code: message} map"""
+        if isinstance(error_codes, dict):
+            for code, message in error_codes.items():
+                self._add(code, message, api, source, snippet)
+        elif isinstance(error_codes, list):
+            for item in error_codes:
+                if isinstance(item, dict) and 'code' in item:
+                    self._add(item['code'], item.get('message', ''), api, source, snippet)
+
+    def _add_text(self, text: str, api: str, source: str):
+        """Parse error code tables from scraped page text"""
+        start = text.find(ERROR_TABLE_HEADER)
+        while start != -1:
+            lines = text[start + len(ERROR_TABLE_HEADER):].split('\n')
+            i = 0
+            # Rows alternate code / message until the table ends
+            while i + 1 < len(lines) and ERROR_CODE_LINE.match(lines[i].strip()):
+                code, message = lines[i].strip(), lines[i + 1]
+                self._add(code, message, api, source, "")
+                i += 2
+            start = text.find(ERROR_TABLE_HEADER, start + len(ERROR_TABLE_HEADER))
+
+    def _walk(self, value: Any, api: str, source: str, snippet: str):
+        """Find error code tables anywhere inside a knowledge base section"""
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key == 'error_codes':
+                    self._add_structured(item, api, source, snippet)
+                else:
+                    self._walk(item, api, source, snippet)
+        elif isinstance(value, list):
+            for item in value:
+                self._walk(item, api, source, snippet)
+        elif isinstance(value, str) and ERROR_TABLE_HEADER in value:
+            self._add_text(value, api, source)
+
+    @classmethod
+    def build(cls, sections: List[Dict[str, Any]], cached_docs: Iterable[Dict[str, Any]] = (),
+              fingerprint: Optional[str] = None) -> "ErrorCatalog":
+        """
+        Build the catalog from knowledge base sections and stored live pages
+
+        Args:
+            sections: KnowledgeBaseIndex sections (title, file, serialized content)
+            cached_docs: Documentation dicts of stored live pages (title, url, content)
+            fingerprint: Identifier of the inputs, stored for staleness checks
+        """
+        catalog = cls(fingerprint=fingerprint)
+
+        for section in sections:
+            value = json.loads(section['content'])
+            snippet = value.get('description', '') if isinstance(value, dict) else ''
+            catalog._walk(value, section['title'], section['file'], snippet or section['title'])
+
+        for doc in cached_docs:
+            catalog._add_text(doc.get('content', ''), doc.get('title', 'Documentation'), doc.get('url', ''))
+
+        return catalog
+
+    def learn(self, doc: Dict[str, Any]) -> List[str]:
+        """
+        Add the error codes of a live documentation page fetched since the catalog was built
+
+        New entries are marked "learned", so keep_learned() can carry them over
+        when the catalog is rebuilt. Returns the codes that were not known before.
+        """
+        known = set(self.entries)
+        self._add_text(doc.get('content', ''), doc.get('title', 'Documentation'), doc.get('url', ''))
+        added = [code for code in self.entries if code not in known]
+        for code in added:
+            self.entries[code]["learned"] = True
+        return added
+
+    def keep_learned(self, previous: "ErrorCatalog"):
+        """Copy learned entries of a previous catalog that this one does not have"""
+        for code, entry in previous.entries.items():
+            if entry.get("learned") and code not in self.entries:
+                self.entries[code] = entry
+
+    def save(self, path: str):
+        """Persist the catalog as JSON (temp file + atomic rename)"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"fingerprint": self.fingerprint, "entries": self.entries}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["ErrorCatalog"]:
+        """Load a persisted catalog, or None if it does not exist or is unreadable"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return cls(data.get("entries", {}), data.get("fingerprint"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
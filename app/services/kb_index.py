@@ -0,0 +1,236 @@
+# app/services/kb_index.py
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from typing import List, Dict, Any, Optional
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]+")
+
+# Weight applied to vocabulary tokens that only contain a query token
+# (e.g. "cancel" -> "cancellation") when the exact token is not indexed
+PARTIAL_MATCH_WEIGHT = 0.5
+
+# Query tokens whose partial matches are remembered per snapshot (least recently used evicted)
+PARTIAL_CACHE_SIZE = 1024
+
+
+def tokenize(text: str) -> List[str]:
+    """Split lowercase text into alphanumeric tokens"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class _IndexSnapshot:
+    """Immutable view of the index - replaced as a whole, never mutated in place"""
+
+    def __init__(self, segments: Dict[str, List[Dict[str, Any]]], kb_files: List[str]):
+        # Section id -> section data (key, title, content, url, file, tf, length)
+        self.sections: List[Dict[str, Any]] = []
+        for kb_file in kb_files:
+            self.sections.extend(segments.get(kb_file, []))
+
+        # Token -> posting list of section ids
+        postings = defaultdict(list)
+        for section_id, section in enumerate(self.sections):
+            for token in section['tf']:
+                postings[token].append(section_id)
+        self.postings: Dict[str, List[int]] = dict(postings)
+
+        # Token -> inverse document frequency
+        total = len(self.sections)
+        self.idf: Dict[str, float] = {
+            token: math.log(1 + (total - len(ids) + 0.5) / (len(ids) + 0.5))
+            for token, ids in self.postings.items()
+        }
+        self.avg_length = sum(s['length'] for s in self.sections) / total if total else 0.0
+
+        # Content hash of all indexed sections (used to validate derived stores)
+        digest = hashlib.sha1()
+        for section in self.sections:
+            digest.update(f"{section['file']}\0{section['key']}\0{section['content']}\0".encode('utf-8'))
+        self.fingerprint = digest.hexdigest()
+
+        # Query token -> indexed tokens containing it (partial matches), bounded LRU
+        self.partial_cache: "OrderedDict[str, List[str]]" = OrderedDict()
+        self.partial_lock = threading.Lock()
+
+
+class KnowledgeBaseIndex:
+    """In-memory BM25 index over all local knowledge base sections"""
+
+    def __init__(self, kb_files: List[str], k1: float = 1.5, b: float = 0.75):
+        self.kb_files = list(kb_files)
+        self.k1 = k1
+        self.b = b
+
+        # Per-file sections and the (mtime, sha256) they were built from
+        self._segments: Dict[str, List[Dict[str, Any]]] = {}
+        self._file_state: Dict[str, tuple] = {}
+        self._refresh_lock = threading.Lock()
+
+        self._snapshot = _IndexSnapshot({}, self.kb_files)
+        self.refresh()
+
+    @property
+    def sections(self) -> List[Dict[str, Any]]:
+        return self._snapshot.sections
+
+    @property
+    def fingerprint(self) -> str:
+        return self._snapshot.fingerprint
+
+    def _parse_sections(self, kb_file: str, raw: bytes) -> List[Dict[str, Any]]:
+        """Serialize and tokenize every section of a knowledge base file"""
+        kb_data = json.loads(raw.decode('utf-8'))
+
+        # Handle nested structures (e.g. data/complete-documentation.json)
+        if isinstance(kb_data.get('documentation'), dict):
+            kb_data = kb_data['documentation']
+
+        sections = []
+        for key, value in kb_data.items():
+            if not isinstance(value, dict):
+                continue
+
+            content = json.dumps(value, indent=2)
+            tokens = tokenize(content)
+            sections.append({
+                'key': key,
+                'title': value.get('title', key),
+                'content': content,
+                'url': value.get('url'),
+                'file': kb_file,
+                'tf': Counter(tokens),
+                'length': len(tokens)
+            })
+        return sections
+
+    def _refresh_file(self, kb_file: str) -> bool:
+        """Re-index a single file if it changed on disk; returns True if its sections changed"""
+        try:
+            mtime = os.stat(kb_file).st_mtime_ns
+        except FileNotFoundError:
+            if kb_file in self._file_state:
+                print(f"✗ Knowledge base file removed: {kb_file}")
+                del self._file_state[kb_file]
+                self._segments.pop(kb_file, None)
+                return True
+            return False
+
+        state = self._file_state.get(kb_file)
+        if state and state[0] == mtime:
+            return False
+
+        try:
+            with open(kb_file, 'rb') as f:
+                raw = f.read()
+            content_hash = hashlib.sha256(raw).hexdigest()
+
+            # Touched but identical content - only remember the new mtime
+            if state and state[1] == content_hash:
+                self._file_state[kb_file] = (mtime, content_hash)
+                return False
+
+            sections = self._parse_sections(kb_file, raw)
+        except (UnicodeDecodeError, json.JSONDecodeError, AttributeError) as e:
+            # Possibly caught mid-write - keep the previous sections and retry next time
+            print(f"✗ Error loading {kb_file}: {e}")
+            return False
+
+        self._file_state[kb_file] = (mtime, content_hash)
+        self._segments[kb_file] = sections
+        return True
+
+    def refresh(self) -> List[str]:
+        """
+        Re-index knowledge base files whose mtime and content hash changed
+
+        Only changed files are re-parsed. The new index is built off to the
+        side and swapped in with a single assignment, so concurrent searches
+        always see either the old or the new index in full.
+
+        Returns:
+            List of files that were re-indexed
+        """
+        with self._refresh_lock:
+            changed = [kb_file for kb_file in self.kb_files if self._refresh_file(kb_file)]
+            if not changed:
+                return []
+
+            snapshot = _IndexSnapshot(self._segments, self.kb_files)
+            self._snapshot = snapshot
+
+        print(f"✓ Knowledge base index built: {len(snapshot.sections)} sections, "
+              f"{len(snapshot.postings)} tokens ({len(changed)} files re-indexed)")
+        return changed
+
+    def _partial_tokens(self, snapshot: _IndexSnapshot, query_token: str) -> List[str]:
+        """Indexed tokens that contain query_token as a substring"""
+        with snapshot.partial_lock:
+            cached = snapshot.partial_cache.get(query_token)
+            if cached is not None:
+                snapshot.partial_cache.move_to_end(query_token)
+                return cached
+
+        cached = [token for token in snapshot.postings if query_token in token]
+        with snapshot.partial_lock:
+            snapshot.partial_cache[query_token] = cached
+            while len(snapshot.partial_cache) > PARTIAL_CACHE_SIZE:
+                snapshot.partial_cache.popitem(last=False)
+        return cached
+
+    def _expand_query(self, snapshot: _IndexSnapshot, query_tokens: List[str]) -> Dict[str, float]:
+        """Map query tokens to weighted indexed tokens"""
+        weights: Dict[str, float] = {}
+        for query_token in query_tokens:
+            if query_token in snapshot.postings:
+                weights[query_token] = weights.get(query_token, 0.0) + 1.0
+                continue
+            for token in self._partial_tokens(snapshot, query_token):
+                weights[token] = max(weights.get(token, 0.0), PARTIAL_MATCH_WEIGHT)
+        return weights
+
+    def search(self, query_tokens: List[str], top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Rank sections against the query with BM25
+
+        Args:
+            query_tokens: Tokenized query terms
+            top_k: Maximum number of results (all matches if None)
+
+        Returns:
+            Matching sections ordered by descending score
+        """
+        # Read the snapshot once so a concurrent refresh cannot mix two indexes
+        snapshot = self._snapshot
+        if not snapshot.sections:
+            return []
+
+        scores: Dict[int, float] = defaultdict(float)
+        for token, weight in self._expand_query(snapshot, query_tokens).items():
+            idf = snapshot.idf[token]
+            for section_id in snapshot.postings[token]:
+                section = snapshot.sections[section_id]
+                tf = section['tf'][token]
+                norm = self.k1 * (1 - self.b + self.b * section['length'] / snapshot.avg_length)
+                scores[section_id] += weight * idf * tf * (self.k1 + 1) / (tf + norm)
+
+        # Ties keep knowledge base file order
+        ranked = sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+        if top_k is not None:
+            ranked = ranked[:top_k]
+
+        return [
+            {
+                'key': snapshot.sections[i]['key'],
+                'title': snapshot.sections[i]['title'],
+                'content': snapshot.sections[i]['content'],
+                'url': snapshot.sections[i]['url'],
+                'file': snapshot.sections[i]['file'],
+                'score': round(score, 4)
+            }
+            for i, score in ranked
+        ]
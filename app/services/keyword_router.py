@@ -0,0 +1,198 @@
+# app/services/keyword_router.py
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton: finds every occurrence of every pattern in one pass over a text"""
+
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns = list(patterns)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        for pattern_id, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(pattern_id)
+
+        # Breadth-first failure links; outputs inherit those of their failure state
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_all(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yield (pattern_id, end_index) for every match; end_index is exclusive"""
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for pattern_id in self._output[state]:
+                yield pattern_id, index + 1
+
+
+class SourceRules:
+    """
+    Scoring rules for one documentation source (docs, recipes or reference)
+
+    Per keyword:
+        phrase_score      if the keyword occurs anywhere in the query
+        word_score        for each query word containing, or contained in, the keyword
+        any_word_score    once if some query word contains the keyword
+        phrase_boost      optional extra (keyword, query) -> points when the keyword occurs
+    Per page:
+        page_boosts       (page or None for every page, query terms, points); the points are
+                          added once per keyword of the page when any term occurs in the query
+    """
+
+    def __init__(self, name: str, keyword_map: Dict[str, str], phrase_score: int, word_score: int,
+                 any_word_score: int, phrase_boost: Optional[Callable[[str, str], int]] = None,
+                 page_boosts: Sequence[Tuple[Optional[str], Sequence[str], int]] = ()):
+        self.name = name
+        self.keyword_map = keyword_map
+        self.phrase_score = phrase_score
+        self.word_score = word_score
+        self.any_word_score = any_word_score
+        self.phrase_boost = phrase_boost
+        self.page_boosts = list(page_boosts)
+
+
+class KeywordRouter:
+    """
+    Scores documentation pages for a query against several keyword maps in one pass
+
+    All keywords are compiled once into an Aho-Corasick automaton (keyword in
+    query / in a query word) and a substring index (query word in keyword), so
+    a query is scored without looping over every keyword. Scores, and the order
+    pages are reported in, match evaluating the rules keyword by keyword.
+    """
+
+    def __init__(self, sources: Sequence[SourceRules]):
+        self.sources = list(sources)
+
+        self.keywords: List[str] = []
+        keyword_ids: Dict[str, int] = {}
+        for source in self.sources:
+            for keyword in source.keyword_map:
+                if keyword not in keyword_ids:
+                    keyword_ids[keyword] = len(self.keywords)
+                    self.keywords.append(keyword)
+
+        self.automaton = AhoCorasick(self.keywords)
+
+        # substring -> ids of keywords containing it
+        self.substring_index: Dict[str, List[int]] = {}
+        for keyword_id, keyword in enumerate(self.keywords):
+            substrings = {keyword[i:j] for i in range(len(keyword)) for j in range(i + 1, len(keyword) + 1)}
+            for substring in substrings:
+                self.substring_index.setdefault(substring, []).append(keyword_id)
+
+        # Per source: keyword entries in map order, and the number of keywords per page
+        self._entries: List[List[Tuple[int, int, str]]] = []
+        self._page_keywords: List[Dict[str, List[int]]] = []
+        for source in self.sources:
+            entries = []
+            page_keywords: Dict[str, List[int]] = {}
+            for position, (keyword, page) in enumerate(source.keyword_map.items()):
+                entries.append((position, keyword_ids[keyword], page))
+                page_keywords.setdefault(page, []).append(position)
+            self._entries.append(entries)
+            self._page_keywords.append(page_keywords)
+
+    def _match(self, query_lower: str) -> Tuple[set, Dict[int, int], set]:
+        """
+        Returns:
+            (keywords occurring in the query,
+             keyword -> number of query words containing it or contained in it,
+             keywords contained in at least one query word)
+        """
+        # Query words as split() sees them, with their character spans
+        words = query_lower.split()
+        word_at: Dict[int, int] = {}
+        position = 0
+        for index, word in enumerate(words):
+            start = query_lower.index(word, position)
+            for offset in range(start, start + len(word)):
+                word_at[offset] = index
+            position = start + len(word)
+
+        in_query = set()
+        in_word = set()
+        # word index -> keywords found inside that word
+        word_matches: List[set] = [set() for _ in words]
+        for keyword_id, end in self.automaton.find_all(query_lower):
+            in_query.add(keyword_id)
+            start = end - len(self.keywords[keyword_id])
+            word_index = word_at.get(start)
+            # Inside a single word only if the whole match lies in that word
+            if word_index is not None and word_at.get(end - 1) == word_index:
+                word_matches[word_index].add(keyword_id)
+                in_word.add(keyword_id)
+
+        word_hits: Dict[int, int] = {}
+        for word_index, word in enumerate(words):
+            matched = word_matches[word_index].union(self.substring_index.get(word, ()))
+            for keyword_id in matched:
+                word_hits[keyword_id] = word_hits.get(keyword_id, 0) + 1
+
+        return in_query, word_hits, in_word
+
+    def score(self, query: str) -> Dict[str, Dict[str, int]]:
+        """Page scores per source name; pages are ordered by their first positively scored keyword"""
+        query_lower = query.lower()
+        in_query, word_hits, in_word = self._match(query_lower)
+
+        results = {}
+        for source, entries, page_keywords in zip(self.sources, self._entries, self._page_keywords):
+            # Pages whose boost applies: every one of their keywords scores positively
+            boosted: Dict[str, int] = {}
+            for page, terms, points in source.page_boosts:
+                if any(term in query_lower for term in terms):
+                    for boosted_page in ([page] if page is not None else page_keywords):
+                        if boosted_page in page_keywords:
+                            boosted[boosted_page] = boosted.get(boosted_page, 0) + points
+
+            scores: Dict[str, int] = {}
+            first_seen: Dict[str, int] = {}
+
+            for page, points in boosted.items():
+                scores[page] = points * len(page_keywords[page])
+                first_seen[page] = page_keywords[page][0]
+
+            candidates = in_query | set(word_hits)
+            for position, keyword_id, page in entries:
+                if keyword_id not in candidates:
+                    continue
+                keyword = self.keywords[keyword_id]
+                score = 0
+                if keyword_id in in_query:
+                    score += source.phrase_score
+                    if source.phrase_boost:
+                        score += source.phrase_boost(keyword, query_lower)
+                score += source.word_score * word_hits.get(keyword_id, 0)
+                if keyword_id in in_word:
+                    score += source.any_word_score
+                if score > 0:
+                    scores[page] = scores.get(page, 0) + score
+                    if page not in first_seen or position < first_seen[page]:
+                        first_seen[page] = position
+
+            results[source.name] = {page: scores[page] for page in sorted(scores, key=first_seen.get)}
+        return results
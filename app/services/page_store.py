@@ -0,0 +1,102 @@
+# app/services/page_store.py
+import hashlib
+import time
+from typing import Dict, Any, Iterator, List, Optional
+
+from app.services.cache_store import SQLiteCacheStore
+
+
+class PageStore:
+    """
+    URL-keyed store of extracted page text and chunks with HTTP validators
+
+    Pages younger than fresh_seconds are served without a request; older pages
+    are revalidated with a conditional GET using the stored ETag/Last-Modified.
+    Pages not fetched or revalidated for ttl_seconds are dropped. Each page is
+    labelled with a hash of its text, so fingerprint() only changes when the
+    stored content does.
+    """
+
+    def __init__(self, db_path: str, fresh_seconds: float, ttl_seconds: float):
+        self.store = SQLiteCacheStore(db_path, "pages", label_for=self._text_hash)
+        self.fresh_seconds = fresh_seconds
+        self.ttl_seconds = ttl_seconds
+
+        # Counters
+        self.fresh_hits = 0
+        self.revalidated = 0
+        self.downloads = 0
+
+    @staticmethod
+    def _text_hash(page: Dict[str, Any]) -> str:
+        return hashlib.sha1(page.get('text', '').encode('utf-8')).hexdigest()
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Stored page {url, text, chunks, etag, last_modified, fetched_at}, or None"""
+        found = self.store.get(url)
+        return found[0] if found else None
+
+    def is_fresh(self, page: Dict[str, Any]) -> bool:
+        return time.time() - page['fetched_at'] < self.fresh_seconds
+
+    def conditional_headers(self, page: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for revalidating a stored page"""
+        headers = {}
+        if page:
+            if page.get('etag'):
+                headers['If-None-Match'] = page['etag']
+            if page.get('last_modified'):
+                headers['If-Modified-Since'] = page['last_modified']
+        return headers
+
+    def put(self, url: str, text: str, chunks: List[Dict[str, Any]],
+            etag: Optional[str], last_modified: Optional[str]) -> Dict[str, Any]:
+        """Store freshly downloaded page text and chunks"""
+        now = time.time()
+        page = {
+            "url": url,
+            "text": text,
+            "chunks": chunks,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": now
+        }
+        self.store.put(url, page, now + self.ttl_seconds)
+        self.downloads += 1
+        return page
+
+    def mark_revalidated(self, page: Dict[str, Any]) -> Dict[str, Any]:
+        """Record a 304 Not Modified: the stored text is current again"""
+        now = time.time()
+        page = {**page, "fetched_at": now}
+        self.store.put(page['url'], page, now + self.ttl_seconds)
+        self.revalidated += 1
+        return page
+
+    def fingerprint(self) -> str:
+        """Identifier of the stored pages (URLs and text hashes), read without decoding pages"""
+        digest = hashlib.sha1()
+        for url, text_hash, _ in sorted(self.store.iter_index()):
+            digest.update(f"{url}:{text_hash}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+    def iter_documents(self) -> Iterator[Dict[str, Any]]:
+        """Stored pages as documentation dicts (title, url, content)"""
+        for url, page, _ in self.store.iter_entries():
+            slug = url.rstrip('/').rsplit('/', 1)[-1]
+            yield {
+                "title": slug.replace('-', ' ').replace('_', ' ').title(),
+                "url": url,
+                "content": page.get('text', '')
+            }
+
+    def close(self):
+        self.store.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "pages": self.store.count(),
+            "fresh_hits": self.fresh_hits,
+            "revalidated": self.revalidated,
+            "downloads": self.downloads
+        }
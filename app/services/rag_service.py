@@ -1,10 +1,24 @@
 # app/services/rag_service.py
+import asyncio
+import hashlib
 import json
-from typing import List, Dict, Any
+import re
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
 from app.config import config
-from app.llm.llm_client import LLMClient
+from app.llm.llm_client import LLMClient, LLMResult, TokenUsage
 from app.services.doc_fetcher import DocumentationFetcher
 from app.services.cache_service import CacheService
+from app.services.kb_index import KnowledgeBaseIndex, tokenize
+from app.services.vector_store import VectorStore, HashingEmbedder
+from app.services.error_catalog import ErrorCatalog, VOLATILE_PATTERNS, extract_error_code
+from app.services.semantic_cache import normalize_question
+from app.services.chunker import select_chunks
+from app.services.context_packer import pack_context
+from app.utils.single_flight import SingleFlight
+from app.utils.metrics import stage, LLM_CALLS_IN_FLIGHT
+
+# Words dropped from questions before BM25 ranking
+QUERY_STOPWORDS = {'what', 'is', 'how', 'do', 'i', 'the', 'a', 'an', 'and', 'or', 'but', 'use'}
 
 
 class RAGService:
@@ -14,131 +28,141 @@ class RAGService:
         self.llm_client = llm_client
         self.doc_fetcher = DocumentationFetcher()
         self.cache_service = CacheService()
+        
+        # Local knowledge base index - built once, shared by all requests
+        self.kb_index = KnowledgeBaseIndex(
+            config.KNOWLEDGE_BASE_FILES,
+            k1=config.BM25_K1,
+            b=config.BM25_B
+        )
+        
+        # Local semantic retrieval over the same sections
+        self.vector_store = VectorStore(HashingEmbedder(config.VECTOR_DIM))
+        self._load_documents()
+        
+        # Pre-parsed error codes for /api/explain
+        self.error_catalog = ErrorCatalog()
+        self._load_error_catalog()
+        
+        # Concurrent identical questions/errors share one LLM call
+        self.single_flight = SingleFlight()
         print("✓ RAG Service initialized - HYBRID mode with caching enabled")
     
     def _load_documents(self):
-        """Load documents from JSON files into vector store"""
+        """Load knowledge base sections into the vector store"""
         try:
-            # Load main knowledge base
-            with open(config.KNOWLEDGE_BASE_PATH, 'r', encoding='utf-8') as f:
-                kb = json.load(f)
-                for key, value in kb.items():
-                    if isinstance(value, dict):
-                        title = value.get('title', key)
-                        text = f"{title}\n{json.dumps(value, indent=2)}"
-                        self.vector_store.add_document(text, {
-                            "source": "knowledge_base",
-                            "key": key,
-                            "title": title
-                        })
-                    else:
-                        text = f"{key}\n{json.dumps(value, indent=2)}"
-                        self.vector_store.add_document(text, {
-                            "source": "knowledge_base",
-                            "key": key,
-                            "title": key
-                        })
+            # Reuse the persisted embeddings if the knowledge base is unchanged
+            stored = VectorStore.load(config.VECTOR_STORE_DIR, self.vector_store.embedder)
+            if stored and stored.fingerprint == self.kb_index.fingerprint:
+                self.vector_store = stored
+                print(f"✓ Loaded {len(self.vector_store.documents)} documents from {config.VECTOR_STORE_DIR}")
+                return
+            
+            store = VectorStore(self.vector_store.embedder)
+            store.add_documents(
+                [f"{section['title']}\n{section['content']}" for section in self.kb_index.sections],
+                [{
+                    "source": "knowledge_base",
+                    "file": section['file'],
+                    "key": section['key'],
+                    "title": section['title'],
+                    "url": section['url']
+                } for section in self.kb_index.sections]
+            )
+            store.fingerprint = self.kb_index.fingerprint
             
-            # Load rooms and rates documentation
+            # The current store may memory-map the persisted vectors: it stays in
+            # use until save() has atomically renamed the new files into place
             try:
-                with open('knowledge-base-rooms-rates.json', 'r', encoding='utf-8') as f:
-                    rooms_kb = json.load(f)
-                    for key, value in rooms_kb.items():
-                        if isinstance(value, dict):
-                            title = value.get('title', key)
-                            text = f"{title}\n{json.dumps(value, indent=2)}"
-                            self.vector_store.add_document(text, {
-                                "source": "rooms_rates_kb",
-                                "key": key,
-                                "title": title
-                            })
-                        else:
-                            text = f"{key}\n{json.dumps(value, indent=2)}"
-                            self.vector_store.add_document(text, {
-                                "source": "rooms_rates_kb",
-                                "key": key,
-                                "title": key
-                            })
-            except FileNotFoundError:
-                pass
+                store.save(config.VECTOR_STORE_DIR)
+            except Exception as e:
+                print(f"⚠ Could not persist vector store: {e}")
+            self.vector_store = store
             
             print(f"✓ Loaded {len(self.vector_store.documents)} documents")
         except Exception as e:
             print(f"✗ Error loading documents: {e}")
     
+    def _load_error_catalog(self):
+        """Load the error code catalog, rebuilding it if its sources changed"""
+        try:
+            # Stored pages are only decoded when the catalog has to be rebuilt
+            page_store = self.doc_fetcher.page_store
+            fingerprint = hashlib.sha1(
+                f"{self.kb_index.fingerprint}:{page_store.fingerprint()}".encode('utf-8')
+            ).hexdigest()
+            
+            stored = ErrorCatalog.load(config.ERROR_CATALOG_PATH)
+            if stored and stored.fingerprint == fingerprint:
+                self.error_catalog = stored
+            else:
+                catalog = ErrorCatalog.build(self.kb_index.sections, page_store.iter_documents(), fingerprint)
+                if stored:
+                    catalog.keep_learned(stored)
+                catalog.save(config.ERROR_CATALOG_PATH)
+                self.error_catalog = catalog
+            
+            print(f"✓ Error catalog ready: {len(self.error_catalog.entries)} error codes")
+        except Exception as e:
+            print(f"✗ Error loading error catalog: {e}")
+    
+    def reload_knowledge_base(self) -> List[str]:
+        """Re-index changed knowledge base files and refresh derived stores"""
+        changed = self.kb_index.refresh()
+        if changed:
+            print(f"🔄 Knowledge base reloaded: {', '.join(changed)}")
+            self._load_documents()
+            self._load_error_catalog()
+        return changed
+    
+    async def watch_knowledge_base(self, interval: float):
+        """Poll knowledge base files for changes until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                # File hashing and parsing run off the event loop
+                await asyncio.to_thread(self.reload_knowledge_base)
+            except Exception as e:
+                print(f"✗ Error reloading knowledge base: {e}")
+    
+    def _search_vector_store(self, question: str) -> List[Dict[str, Any]]:
+        """Semantic fallback over the local vector store"""
+        results = []
+        for hit in self.vector_store.search(question, top_k=config.CONTEXT_CANDIDATES):
+            if hit['score'] < config.VECTOR_MIN_SIMILARITY:
+                continue
+            
+            # Documents are stored as "title\ncontent"
+            _, _, content = hit['text'].partition('\n')
+            results.append({
+                'key': hit['metadata']['key'],
+                'title': hit['metadata']['title'],
+                'content': content,
+                'url': hit['metadata'].get('url'),
+                'file': hit['metadata']['file'],
+                'score': hit['score']
+            })
+        return results
+    
     def _search_local_knowledge_base(self, question: str) -> List[Dict[str, Any]]:
         """
-        NO RULES, NO SCORES - SEARCH EVERYWHERE
+        Rank local knowledge base sections with BM25 and keep the top candidates for context packing
         """
-        question_lower = question.lower()
-        
-        # Extract key terms from the question (more flexible)
-        search_terms = []
-        
-        # Remove common words and extract meaningful terms
-        words = question_lower.replace('what is ', '').replace('how do i ', '').replace('?', '').strip().split()
-        meaningful_words = [w for w in words if w not in ['the', 'a', 'an', 'and', 'or', 'but', 'use', 'do', 'i']]
-        
-        # Add the full cleaned question as one search term
-        full_term = ' '.join(meaningful_words)
-        search_terms.append(full_term)
-        
-        # Add individual meaningful words
-        search_terms.extend(meaningful_words)
-        
-        results = []
-        
-        # Search ALL knowledge base files
-        kb_files = [
-            'knowledge-base.json',
-            'knowledge-base-extended.json', 
-            'knowledge-base-dynamic.json',
-            'knowledge-base-rooms-rates.json',
-            'data/knowledge-base.json',
-            'data/knowledge-base-extended.json',
-            'data/complete-documentation.json'
+        # Tokenize first so punctuation fragments ("what's" -> "what", "s") are filtered too
+        query_tokens = [
+            token for token in tokenize(question)
+            if len(token) > 1 and token not in QUERY_STOPWORDS
         ]
         
-        print(f"🔍 SEARCHING EVERYWHERE for terms: {search_terms}")
+        print(f"🔍 Ranking knowledge base for terms: {query_tokens}")
         
-        for kb_file in kb_files:
-            try:
-                with open(kb_file, 'r', encoding='utf-8') as f:
-                    kb_data = json.load(f)
-                    
-                    # Handle nested structures
-                    if kb_file == 'data/complete-documentation.json' and 'documentation' in kb_data:
-                        kb_data = kb_data['documentation']
-                    
-                    for key, value in kb_data.items():
-                        if not isinstance(value, dict):
-                            continue
-                            
-                        title = value.get('title', key)
-                        content = json.dumps(value, indent=2)
-                        content_lower = content.lower()
-                        
-                        # FLEXIBLE SEARCH: Check if ANY search term appears in content
-                        found_match = False
-                        for term in search_terms:
-                            if term in content_lower:
-                                found_match = True
-                                break
-                        
-                        if found_match:
-                            print(f"✅ FOUND match in {key}")
-                            results.append({
-                                'key': key,
-                                'title': title,
-                                'content': content,
-                                'file': kb_file
-                            })
-                            
-            except (FileNotFoundError, json.JSONDecodeError) as e:
-                print(f"✗ Error loading {kb_file}: {e}")
-                continue
+        results = self.kb_index.search(query_tokens, top_k=config.CONTEXT_CANDIDATES)
+        
+        # No keyword overlap at all - try semantic similarity before going live
+        if not results:
+            results = self._search_vector_store(question)
         
-        print(f"📚 Found {len(results)} total matches")
+        print(f"📚 Found {len(results)} ranked matches")
         return results
     
     def _emergency_search_everywhere(self, search_term: str) -> List[Dict[str, Any]]:
@@ -414,32 +438,23 @@ PROVIDE YOUR ERROR EXPLANATION:"""
         answer_lower = answer.lower()
         return any(phrase in answer_lower for phrase in not_found_phrases)
     
-    async def generate_answer(self, question: str) -> Dict[str, Any]:
+    async def _retrieve_context(self, question: str) -> Optional[Tuple[List[Dict[str, Any]], str]]:
         """
-        Complete RAG pipeline - HYBRID mode with caching
+        Retrieve context documents for a question
         
-        Flow:
-        1. Check response cache first
-        2. Check local knowledge base files with improved scoring
-        3. If no good match, fetch from live documentation (with doc caching)
-        4. Generate answer and cache it
-        5. Return cached or fresh response
+        Returns:
+            (context_docs, source_type), or None if no documentation was found
         """
-        # Check response cache first
-        cached_response = self.cache_service.get_response(question, "question")
-        if cached_response:
-            return cached_response
-        
         print(f"🔍 Searching for: {question}")
         
         # First, search local knowledge base files with improved scoring
-        local_docs = self._search_local_knowledge_base(question)
+        with stage("local_search"):
+            local_docs = self._search_local_knowledge_base(question)
         
         # ALWAYS use local knowledge base if ANY results found
         if local_docs:
-            print(f"✓ Using all found documents: {len(local_docs)} matches")
+            print(f"✓ Using top ranked documents: {len(local_docs)} candidates")
             
-            # Use ALL results for context
             context_docs = []
             for doc in local_docs:
                 context_docs.append({
@@ -448,56 +463,74 @@ PROVIDE YOUR ERROR EXPLANATION:"""
                         "source": "local_knowledge_base",
                         "file": doc['file'],
                         "title": doc['title'],
-                        "key": doc['key']
+                        "key": doc['key'],
+                        "score": doc['score']
                     }
                 })
+                # Crawled snapshot sections link back to their page
+                if doc.get('url'):
+                    context_docs[-1]["metadata"]["url"] = doc['url']
             
-            source_type = "local_knowledge_base"
-        else:
-            # Fallback to live documentation
-            print(f"📚 No good local match, fetching live documentation")
+            # Drop duplicate sections and keep the TOP_K_DOCUMENTS most valuable ones within the token budget
+            with stage("context_pack"):
+                context_docs = pack_context(
+                    context_docs,
+                    token_budget=config.CONTEXT_TOKEN_BUDGET,
+                    max_docs=config.TOP_K_DOCUMENTS,
+                    mmr_lambda=config.CONTEXT_MMR_LAMBDA,
+                    near_duplicate=config.CONTEXT_NEAR_DUPLICATE
+                )
             
-            # Check documentation cache
-            cached_doc = self.cache_service.get_documentation(question)
-            if cached_doc:
-                live_doc = cached_doc
-            else:
-                # Fetch from live documentation
-                live_doc = await self.doc_fetcher.fetch_documentation(question)
-                if live_doc:
-                    # Cache the documentation
-                    self.cache_service.set_documentation(question, live_doc)
-            
-            if not live_doc:
-                response = {
-                    "answer": "I couldn't find relevant documentation. Please ensure the question is about ZentrumHub Hotel API or visit https://docs-hotel.prod.zentrumhub.com/docs directly.",
-                    "confidence": "low",
-                    "sources": [],
-                    "relevant_docs": 0,
-                    "source_type": "none"
-                }
-                return response
-            
-            print(f"✓ Using live documentation: {live_doc['title']} from {live_doc['url']}")
-            
-            # Use documentation as context
-            context_docs = [{
-                "text": f"{live_doc['title']}\n{live_doc['content']}",
-                "metadata": {
-                    "source": "live_docs",
-                    "url": live_doc['url'],
-                    "title": live_doc['title']
-                }
-            }]
-            
-            source_type = "live_documentation"
+            return context_docs, "local_knowledge_base"
         
-        # Build prompt with context
-        prompt = self.build_prompt(question, context_docs)
+        # Fallback to live documentation
+        print(f"📚 No good local match, fetching live documentation")
         
-        # Generate answer using Gemini 2.5 Pro
-        answer = await self.llm_client.generate(prompt)
+        # Page content always comes from the URL-keyed PageStore: fresh pages are
+        # served without a request, stale ones revalidated (timed as live_fetch/html_parse)
+        live_doc = await self.doc_fetcher.fetch_documentation(question)
+        
+        if not live_doc:
+            return None
         
+        print(f"✓ Using live documentation: {live_doc['title']} from {live_doc['url']}")
+        
+        # Use the relevant parts of the documentation as context
+        context_docs = [{
+            "text": self._live_doc_text(question, live_doc),
+            "metadata": {
+                "source": "live_docs",
+                "url": live_doc['url'],
+                "title": live_doc['title']
+            }
+        }]
+        
+        return context_docs, "live_documentation"
+    
+    def _live_doc_text(self, question: str, live_doc: Dict[str, Any]) -> str:
+        """Prompt text for a live page: only the chunks relevant to the question, within the token budget"""
+        chunks = live_doc.get('chunks')
+        if not chunks:
+            return f"{live_doc['title']}\n{live_doc['content']}"
+        
+        with stage("chunk_select"):
+            selected = select_chunks(question, chunks, config.LIVE_CONTEXT_TOKEN_BUDGET)
+        print(f"✂️ Using {len(selected)}/{len(chunks)} chunks of {live_doc['title']}")
+        return f"{live_doc['title']}\n" + "\n\n".join(chunk['text'] for chunk in selected)
+    
+    def _no_documentation_response(self) -> Dict[str, Any]:
+        """Response returned when no documentation matches the question"""
+        return {
+            "answer": "I couldn't find relevant documentation. Please ensure the question is about ZentrumHub Hotel API or visit https://docs-hotel.prod.zentrumhub.com/docs directly.",
+            "confidence": "low",
+            "sources": [],
+            "relevant_docs": 0,
+            "source_type": "none"
+        }
+    
+    def _finalize_answer(self, question: str, answer: str, context_docs: List[Dict[str, Any]], source_type: str,
+                         usage: Optional[TokenUsage] = None) -> Dict[str, Any]:
+        """Build the response for a generated answer and cache it if useful (with the usage that produced it)"""
         # Check if this is a "not found" response - don't cache these
         if self._is_not_found_response(answer):
             print(f"⚠️ Not caching 'not found' response for: {question}")
@@ -506,7 +539,8 @@ PROVIDE YOUR ERROR EXPLANATION:"""
                 "confidence": "low",  # Set confidence to low for not found responses
                 "sources": [doc.get("metadata", {}) for doc in context_docs],
                 "relevant_docs": len(context_docs),
-                "source_type": source_type
+                "source_type": source_type,
+                "usage": usage.to_dict() if usage else None
             }
         
         # Prepare response
@@ -515,17 +549,164 @@ PROVIDE YOUR ERROR EXPLANATION:"""
             "confidence": "high",
             "sources": [doc.get("metadata", {}) for doc in context_docs],
             "relevant_docs": len(context_docs),
-            "source_type": source_type
+            "source_type": source_type,
+            "usage": usage.to_dict() if usage else None
         }
         
         # Cache the response (only if it's not a "not found" response)
-        self.cache_service.set_response(question, response, "question")
+        with stage("cache_write"):
+            self.cache_service.set_response(question, response, "question")
         
         return response
     
+    async def _generate(self, prompt: str) -> LLMResult:
+        """Call the LLM, timed as the llm_call stage"""
+        with stage("llm_call"), LLM_CALLS_IN_FLIGHT.track_inprogress():
+            return await self.llm_client.complete(prompt)
+    
+    async def _coalesce(self, key: str, coro_factory) -> Dict[str, Any]:
+        """
+        Run the work for key through single-flight
+        
+        Callers that joined a call already in flight get the response marked
+        "coalesced", so its token usage is attributed only to the first caller.
+        """
+        joined = self.single_flight.is_in_flight(key)
+        response = await self.single_flight.do(key, coro_factory)
+        return {**response, "coalesced": True} if joined else response
+    
+    async def generate_answer(self, question: str) -> Dict[str, Any]:
+        """
+        Complete RAG pipeline - HYBRID mode with caching
+        
+        Flow:
+        1. Check response cache first
+        2. Check local knowledge base files with improved scoring
+        3. If no good match, fetch from live documentation (with doc caching)
+        4. Generate answer and cache it
+        5. Return cached or fresh response
+        """
+        # Check response cache first
+        with stage("cache_lookup"):
+            cached_response = self.cache_service.get_response(question, "question")
+        if cached_response:
+            return cached_response
+        
+        # Callers asking the same question while it is being answered wait for that answer
+        return await self._coalesce(
+            f"question:{normalize_question(question)}",
+            lambda: self._answer_question(question)
+        )
+    
+    async def _answer_question(self, question: str) -> Dict[str, Any]:
+        """Retrieve context and generate a fresh answer"""
+        retrieved = await self._retrieve_context(question)
+        if not retrieved:
+            return self._no_documentation_response()
+        context_docs, source_type = retrieved
+        
+        # Build prompt with context
+        with stage("prompt_build"):
+            prompt = self.build_prompt(question, context_docs)
+        
+        # Generate answer using Gemini 2.5 Pro
+        result = await self._generate(prompt)
+        
+        return self._finalize_answer(question, result.text, context_docs, source_type, result.usage)
+    
+    async def generate_answer_stream(self, question: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of generate_answer
+        
+        Yields:
+            {"type": "token", "text": ...} events as the answer is generated,
+            then one {"type": "done", "response": ...} event with the same
+            response dict generate_answer would return (cached as usual)
+        """
+        # Cached answers are sent in a single chunk
+        with stage("cache_lookup"):
+            cached_response = self.cache_service.get_response(question, "question")
+        if cached_response:
+            yield {"type": "token", "text": cached_response["answer"]}
+            yield {"type": "done", "response": cached_response}
+            return
+        
+        retrieved = await self._retrieve_context(question)
+        if not retrieved:
+            response = self._no_documentation_response()
+            yield {"type": "token", "text": response["answer"]}
+            yield {"type": "done", "response": response}
+            return
+        context_docs, source_type = retrieved
+        
+        with stage("prompt_build"):
+            prompt = self.build_prompt(question, context_docs)
+        
+        chunks = []
+        usage = None
+        # Includes time the consumer spends between tokens
+        with stage("llm_call"), LLM_CALLS_IN_FLIGHT.track_inprogress():
+            async for chunk in self.llm_client.complete_stream(prompt):
+                usage = chunk.usage or usage
+                if chunk.text:
+                    chunks.append(chunk.text)
+                    yield {"type": "token", "text": chunk.text}
+        
+        response = self._finalize_answer(question, "".join(chunks), context_docs, source_type, usage)
+        yield {"type": "done", "response": response}
+    
+    def _normalize_error(self, error_content: str) -> Tuple[Optional[str], str]:
+        """
+        Split error content into (error code, normalized message)
+        
+        Volatile IDs, paths and timestamps are removed from the message, so the
+        same error reported for different resources normalizes identically.
+        """
+        message = error_content.lower()
+        for pattern in VOLATILE_PATTERNS:
+            message = pattern.sub(" ", message)
+        words = re.findall(r"[a-z0-9_\[\]]+", message)
+        
+        # The same extraction the catalog lookup and doc fetcher use
+        error_code = extract_error_code(error_content)
+        
+        return error_code, " ".join(words)
+    
+    def _error_signature(self, error_content: str) -> str:
+        """Normalized error signature used as the explain cache key"""
+        error_code, message = self._normalize_error(error_content)
+        return f"{error_code or 'none'}|{message}"
+    
+    def _catalog_context(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a context document from an error catalog entry"""
+        lines = [
+            f"Error Code {entry['code']}: {entry['message']}",
+            f"Documented by: {', '.join(entry['apis'])}",
+            ""
+        ]
+        for context in entry['contexts']:
+            lines.append(f"- {context['api']}: {context['message']}")
+            if context['snippet']:
+                lines.append(f"  Context: {context['snippet']}")
+        
+        # Prefer a live docs URL when the code was seen on a scraped page
+        url = next(
+            (c['source'] for c in entry['contexts'] if c['source'].startswith('http')),
+            "https://docs-hotel.prod.zentrumhub.com/docs"
+        )
+        
+        return {
+            "text": "ZentrumHub API Error Codes\n" + "\n".join(lines),
+            "metadata": {
+                "source": "error_catalog",
+                "url": url,
+                "title": f"Error {entry['code']}"
+            }
+        }
+    
     async def explain_error(self, error_content: str) -> Dict[str, Any]:
         """
-        Explain error codes using live documentation
+        Explain error codes using the error catalog, or live documentation for unknown codes
         
         Args:
             error_content: Error message or code to explain
@@ -533,36 +714,69 @@ PROVIDE YOUR ERROR EXPLANATION:"""
         Returns:
             Dictionary with explanation and metadata
         """
-        # Fetch documentation about errors
-        print(f"🔍 Fetching error documentation for: {error_content}")
-        live_doc = await self.doc_fetcher.fetch_documentation(f"error {error_content}")
-        
-        if not live_doc:
-            return {
-                "answer": "Error code not found in documentation. Please check the error code or visit https://docs-hotel.prod.zentrumhub.com/docs",
-                "confidence": "low",
-                "sources": [],
-                "relevant_docs": 0,
-                "source_type": "none"
-            }
-        
-        print(f"✓ Fetched error documentation from {live_doc['url']}")
+        # Check explain cache first
+        signature = self._error_signature(error_content)
+        with stage("cache_lookup"):
+            cached_response = self.cache_service.get_response(signature, "explain")
+        if cached_response:
+            return cached_response
         
-        # Use live documentation as context
-        context_docs = [{
-            "text": f"{live_doc['title']}\n{live_doc['content']}",
-            "metadata": {
-                "source": "live_docs",
-                "url": live_doc['url'],
-                "title": live_doc['title']
-            }
-        }]
+        return await self._coalesce(
+            f"explain:{signature}",
+            lambda: self._explain_uncached(error_content, signature)
+        )
+    
+    async def _explain_uncached(self, error_content: str, signature: str) -> Dict[str, Any]:
+        """Explain an error that is not in the explain cache"""
+        # Known error codes are answered from the pre-parsed catalog
+        error_code = extract_error_code(error_content)
+        catalog_entry = self.error_catalog.get(error_code)
+        
+        if catalog_entry:
+            print(f"📖 Error catalog HIT for {error_code}")
+            context_docs = [self._catalog_context(catalog_entry)]
+            source_type = "error_catalog"
+        else:
+            # Unknown code - fetch documentation about errors
+            print(f"🔍 Fetching error documentation for: {error_content}")
+            live_doc = await self.doc_fetcher.fetch_documentation(f"error {error_content}")
+            
+            if not live_doc:
+                return {
+                    "answer": "Error code not found in documentation. Please check the error code or visit https://docs-hotel.prod.zentrumhub.com/docs",
+                    "confidence": "low",
+                    "sources": [],
+                    "relevant_docs": 0,
+                    "source_type": "none"
+                }
+            
+            print(f"✓ Fetched error documentation from {live_doc['url']}")
+            
+            # Codes found on the page are answered from the catalog from now on
+            learned = self.error_catalog.learn(live_doc)
+            if learned:
+                print(f"📖 Added {len(learned)} error codes to the catalog from {live_doc['url']}")
+                self.error_catalog.save(config.ERROR_CATALOG_PATH)
+            
+            # Use live documentation as context
+            context_docs = [{
+                "text": self._live_doc_text(error_content, live_doc),
+                "metadata": {
+                    "source": "live_docs",
+                    "url": live_doc['url'],
+                    "title": live_doc['title']
+                }
+            }]
+            source_type = "live_documentation"
         
         # Build specialized error explanation prompt
-        prompt = self.build_explain_prompt(error_content, context_docs)
+        with stage("prompt_build"):
+            prompt = self.build_explain_prompt(error_content, context_docs)
         
         # Generate explanation using Gemini 2.5 Pro
-        answer = await self.llm_client.generate(prompt)
+        result = await self._generate(prompt)
+        answer = result.text
+        usage = result.usage
         
         # Check if this is a "not found" response - don't cache these
         if self._is_not_found_response(answer):
@@ -572,14 +786,21 @@ PROVIDE YOUR ERROR EXPLANATION:"""
                 "confidence": "low",  # Set confidence to low for not found responses
                 "sources": [doc.get("metadata", {}) for doc in context_docs],
                 "relevant_docs": len(context_docs),
-                "source_type": "live_documentation"
+                "source_type": source_type,
+                "usage": usage.to_dict() if usage else None
             }
         
-        # Return response (only cache if it's not a "not found" response)
-        return {
+        response = {
             "answer": answer,
             "confidence": "high",
             "sources": [doc.get("metadata", {}) for doc in context_docs],
             "relevant_docs": len(context_docs),
-            "source_type": "live_documentation"
+            "source_type": source_type,
+            "usage": usage.to_dict() if usage else None
         }
+        
+        # Cache the response (only if it's not a "not found" response)
+        with stage("cache_write"):
+            self.cache_service.set_response(signature, response, "explain")
+        
+        return response
@@ -0,0 +1,107 @@
+# app/services/semantic_cache.py
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.services.vector_store import HashingEmbedder
+
+# Words that do not change what a question is asking for
+QUESTION_STOPWORDS = {
+    'a', 'an', 'the', 'and', 'or', 'but', 'is', 'are', 'was', 'what', 'whats', 'how', 'do', 'does',
+    'did', 'i', 'me', 'my', 'to', 'of', 'for', 'in', 'on', 'can', 'should', 'please', 'tell',
+    'about', 'explain', 'define', 'mean', 'means', 'this', 'it', 'we', 'you', 'your', 'with'
+}
+
+# Words that flip or narrow what a question asks for; near-duplicates must agree on them
+# ("t" is what remains of contractions like "can't" after punctuation is dropped)
+QUALIFIER_WORDS = {
+    'not', 'no', 'never', 'without', 'except', 'cannot', 't', 'only', 'before', 'after',
+    'request', 'response', 'success', 'failure', 'error', 'partial', 'full'
+}
+
+WORD_PATTERN = re.compile(r"[a-z0-9_]+")
+NUMBER_PATTERN = re.compile(r"\d+")
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, drop punctuation and stopwords, collapse whitespace"""
+    words = WORD_PATTERN.findall(question.lower())
+    meaningful = [w for w in words if w not in QUESTION_STOPWORDS]
+    # A question made only of stopwords still needs a stable key
+    return ' '.join(meaningful or words)
+
+
+def _guard_terms(normalized_question: str) -> frozenset:
+    """Numbers and qualifier words a near-duplicate has to share exactly"""
+    qualifiers = QUALIFIER_WORDS.intersection(normalized_question.split())
+    return frozenset(qualifiers.union(NUMBER_PATTERN.findall(normalized_question)))
+
+
+class SemanticQuestionIndex:
+    """
+    Near-duplicate lookup over cached questions
+
+    Questions are embedded with the offline HashingEmbedder; a lookup returns the
+    cache key of the most similar cached question above the threshold. Questions
+    mentioning different numbers (error codes, ids) or different qualifier words
+    (negations such as "not", or "request" vs "response") never match each other.
+    """
+
+    def __init__(self, embedder: HashingEmbedder, threshold: float, max_entries: int):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.max_entries = max_entries
+
+        # cache key -> (vector, guard terms), oldest first
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, frozenset]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._keys = []
+        self._matrix: Optional[np.ndarray] = None
+
+    def add(self, cache_key: str, normalized_question: str):
+        """Index a cached question, evicting the oldest over the limit"""
+        vector = self.embedder.embed(normalized_question)
+        guard = _guard_terms(normalized_question)
+        with self._lock:
+            self._entries.pop(cache_key, None)
+            self._entries[cache_key] = (vector, guard)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def remove(self, cache_key: str):
+        with self._lock:
+            if self._entries.pop(cache_key, None) is not None:
+                self._matrix = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def find(self, normalized_question: str) -> Optional[Tuple[str, float]]:
+        """Return (cache_key, similarity) of the closest cached question, or None"""
+        with self._lock:
+            if not self._entries:
+                return None
+            # Rebuild the contiguous matrix only after the index changed
+            if self._matrix is None:
+                self._keys = list(self._entries.keys())
+                self._matrix = np.stack([self._entries[key][0] for key in self._keys])
+            keys, matrix = self._keys, self._matrix
+
+            guard = _guard_terms(normalized_question)
+            scores = matrix @ self.embedder.embed(normalized_question)
+            for index in np.argsort(-scores):
+                score = float(scores[index])
+                if score < self.threshold:
+                    return None
+                if self._entries[keys[index]][1] == guard:
+                    return keys[index], score
+        return None
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,193 @@
+# app/services/vector_store.py
+import json
+import os
+import zlib
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from app.services.kb_index import tokenize
+
+
+class HashingEmbedder:
+    """Deterministic offline embedder using hashed word and character n-gram features"""
+
+    def __init__(self, dim: int = 512, ngram_range: tuple = (3, 5)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+
+    def _features(self, text: str) -> Dict[int, float]:
+        """Accumulate signed hashed feature counts for a text"""
+        features: Dict[int, float] = {}
+        min_n, max_n = self.ngram_range
+
+        for word in tokenize(text):
+            grams = [word]
+            padded = f" {word} "
+            for n in range(min_n, max_n + 1):
+                grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+            for gram in grams:
+                h = zlib.crc32(gram.encode('utf-8'))
+                sign = 1.0 if (h >> 31) & 1 else -1.0
+                index = h % self.dim
+                features[index] = features.get(index, 0.0) + sign
+
+        return features
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed a single text into an L2-normalized float32 vector"""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for index, value in self._features(text).items():
+            # Sublinear scaling keeps long sections from dominating
+            vector[index] = np.sign(value) * np.log1p(abs(value))
+
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed several texts into a contiguous (n, dim) float32 matrix"""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            matrix[i] = self.embed(text)
+        return matrix
+
+    def get_params(self) -> Dict[str, Any]:
+        """Parameters that determine the embedding space"""
+        return {"dim": self.dim, "ngram_range": list(self.ngram_range)}
+
+
+class VectorStore:
+    """In-memory vector store backed by a contiguous float32 embedding matrix"""
+
+    VECTORS_FILE = "vectors.npy"
+    DOCUMENTS_FILE = "documents.json"
+
+    def __init__(self, embedder: Optional[HashingEmbedder] = None):
+        self.embedder = embedder or HashingEmbedder()
+        self.documents: List[Dict[str, Any]] = []
+        self.fingerprint: Optional[str] = None
+
+        self._matrix = np.zeros((0, self.embedder.dim), dtype=np.float32)
+        self._pending: List[np.ndarray] = []
+
+    def add_document(self, text: str, metadata: Dict[str, Any]):
+        """Embed and add a single document"""
+        self.documents.append({"text": text, "metadata": metadata})
+        self._pending.append(self.embedder.embed(text))
+
+    def add_documents(self, texts: List[str], metadatas: List[Dict[str, Any]]):
+        """Embed and add documents in one batch"""
+        self.documents.extend(
+            {"text": text, "metadata": metadata}
+            for text, metadata in zip(texts, metadatas)
+        )
+        self._pending.append(self.embedder.embed_batch(texts))
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Embedding matrix with any pending rows appended"""
+        if self._pending:
+            rows = [self._matrix] + [np.atleast_2d(p) for p in self._pending]
+            self._matrix = np.ascontiguousarray(np.vstack(rows), dtype=np.float32)
+            self._pending = []
+        return self._matrix
+
+    def search_batch(self, queries: List[str], top_k: int = 5) -> List[List[Dict[str, Any]]]:
+        """
+        Cosine top-K search for several queries at once
+
+        Args:
+            queries: Query texts
+            top_k: Maximum results per query
+
+        Returns:
+            One list of {text, metadata, score} results per query
+        """
+        matrix = self.matrix
+        if not queries:
+            return []
+        if matrix.shape[0] == 0:
+            return [[] for _ in queries]
+
+        # Rows are L2-normalized, so a dot product is the cosine similarity
+        scores = self.embedder.embed_batch(queries) @ matrix.T
+        k = min(top_k, matrix.shape[0])
+
+        results = []
+        for row in scores:
+            top = np.argpartition(-row, k - 1)[:k]
+            top = top[np.argsort(-row[top], kind='stable')]
+            results.append([
+                {
+                    "text": self.documents[i]["text"],
+                    "metadata": self.documents[i]["metadata"],
+                    "score": round(float(row[i]), 4)
+                }
+                for i in top
+            ])
+        return results
+
+    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Cosine top-K search for a single query"""
+        return self.search_batch([query], top_k)[0]
+
+    def save(self, directory: str):
+        """
+        Persist embeddings as .npy and documents as JSON
+
+        Each file is written to a temp file and renamed into place, so stores
+        that memory-map the previous vectors.npy (in this or another process)
+        keep reading the old, unlinked file instead of one being rewritten
+        under them. A reader seeing new documents with old vectors (between
+        the two renames) fails load()'s shape or fingerprint check and rebuilds.
+        """
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        suffix = f".{os.getpid()}.tmp"
+
+        vectors_tmp = path / (self.VECTORS_FILE + suffix)
+        with open(vectors_tmp, 'wb') as f:
+            np.save(f, self.matrix)
+        os.replace(vectors_tmp, path / self.VECTORS_FILE)
+
+        documents_tmp = path / (self.DOCUMENTS_FILE + suffix)
+        with open(documents_tmp, 'w', encoding='utf-8') as f:
+            json.dump({
+                "fingerprint": self.fingerprint,
+                "embedder": self.embedder.get_params(),
+                "documents": self.documents
+            }, f, ensure_ascii=False)
+        os.replace(documents_tmp, path / self.DOCUMENTS_FILE)
+
+    @classmethod
+    def load(cls, directory: str, embedder: Optional[HashingEmbedder] = None) -> Optional["VectorStore"]:
+        """
+        Load a persisted store, memory-mapping the embedding matrix
+
+        Returns None if the store is missing or was built with a different embedder
+        """
+        path = Path(directory)
+        vectors_file = path / cls.VECTORS_FILE
+        documents_file = path / cls.DOCUMENTS_FILE
+        if not vectors_file.exists() or not documents_file.exists():
+            return None
+
+        store = cls(embedder)
+        with open(documents_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        if data.get("embedder") != store.embedder.get_params():
+            return None
+
+        matrix = np.load(vectors_file, mmap_mode='r')
+        if matrix.shape != (len(data["documents"]), store.embedder.dim):
+            return None
+
+        store._matrix = matrix
+        store.documents = data["documents"]
+        store.fingerprint = data.get("fingerprint")
+        return store
@@ -1,24 +1,70 @@
 # app/utils/analytics.py
-from collections import defaultdict
+from collections import defaultdict, deque
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
+import atexit
 import json
 import os
+import threading
+
+from app.config import config
+from app.utils.stream_stats import TopKTracker, TimeBucketRollup, ClientSketches, parse_window
+from app.utils.usage_stats import UsageLedger
 
 class Analytics:
-    """Persistent analytics tracker for queries"""
+    """
+    Persistent analytics tracker for queries
+    
+    Writes are batched: logging only updates memory, and a background thread
+    writes analytics_data.json when events are pending, every flush_interval
+    seconds or as soon as flush_every events are buffered.
+    
+    Read endpoints are served from incrementally maintained aggregates (top-K
+    trackers, running feedback counters, recent-feedback ring buffers and
+    hourly/daily rollups), so their cost does not grow with history size.
+    """
     
-    def __init__(self, storage_file: str = "analytics_data.json"):
+    def __init__(self, storage_file: str = "analytics_data.json",
+                 flush_interval: float = config.ANALYTICS_FLUSH_INTERVAL,
+                 flush_every: int = config.ANALYTICS_FLUSH_EVERY):
         self.storage_file = storage_file
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
         self.query_counter = defaultdict(int)
-        self.client_query_counter = defaultdict(lambda: defaultdict(int))
+        # Per-client query frequencies (Count-Min Sketch + top-K, bounded by a memory budget)
+        self.client_sketches = ClientSketches(
+            memory_budget=config.ANALYTICS_CLIENT_MEMORY_BUDGET,
+            width=config.ANALYTICS_CLIENT_SKETCH_WIDTH,
+            depth=config.ANALYTICS_CLIENT_SKETCH_DEPTH,
+            top_k=config.ANALYTICS_CLIENT_TOP_K,
+            idle_seconds=config.ANALYTICS_CLIENT_IDLE_SECONDS
+        )
         self.unanswered_counter = defaultdict(lambda: {
             "count": 0,
             "first_seen": None,
             "last_seen": None
         })
         self.feedback_data = []  # List of feedback entries
+        
+        # Time-bucketed rollups for windowed queries
+        self.rollups = {
+            "hourly": TimeBucketRollup("hourly", config.ANALYTICS_HOURLY_BUCKETS, config.ANALYTICS_BUCKET_SKETCH_SIZE),
+            "daily": TimeBucketRollup("daily", config.ANALYTICS_DAILY_BUCKETS, config.ANALYTICS_BUCKET_SKETCH_SIZE)
+        }
+        # LLM token usage per endpoint, source_type and client
+        self.token_usage = UsageLedger(config.ANALYTICS_USAGE_MAX_CLIENTS)
         self._load_from_storage()
+        self._build_aggregates()
+        
+        # Write-behind state
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._pending = 0
+        self._wake = threading.Event()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_loop, name="analytics-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
     
     def _load_from_storage(self):
         """Load analytics from persistent storage"""
@@ -30,10 +76,13 @@ class Analytics:
                     # Load query counter
                     self.query_counter = defaultdict(int, data.get("query_counter", {}))
                     
-                    # Load client query counter
-                    client_data = data.get("client_query_counter", {})
-                    for client_id, queries in client_data.items():
-                        self.client_query_counter[client_id] = defaultdict(int, queries)
+                    # Load per-client sketches, migrating the legacy exact counters once
+                    if "client_sketches" in data:
+                        self.client_sketches.load(data["client_sketches"])
+                    else:
+                        for client_id, queries in data.get("client_query_counter", {}).items():
+                            for question, count in queries.items():
+                                self.client_sketches.add(client_id, question, count)
                     
                     # Load unanswered counter
                     unanswered_data = data.get("unanswered_counter", {})
@@ -43,95 +92,249 @@ class Analytics:
                     # Load feedback data
                     self.feedback_data = data.get("feedback_data", [])
                     
+                    # Load rollups
+                    for granularity, buckets in data.get("rollups", {}).items():
+                        if granularity in self.rollups:
+                            self.rollups[granularity].load(buckets)
+                    
+                    # Load token usage
+                    self.token_usage.load(data.get("token_usage", {}))
+                    
                     print(f"✓ Loaded analytics from {self.storage_file}")
                     print(f"  - Total feedback entries: {len(self.feedback_data)}")
         except Exception as e:
             print(f"⚠ Could not load analytics: {e}")
     
-    def _save_to_storage(self):
-        """Save analytics to persistent storage"""
-        try:
-            data = {
-                "query_counter": dict(self.query_counter),
-                "client_query_counter": {
-                    client_id: dict(queries)
-                    for client_id, queries in self.client_query_counter.items()
-                },
-                "unanswered_counter": dict(self.unanswered_counter),
-                "feedback_data": self.feedback_data,
-                "last_updated": datetime.utcnow().isoformat()
+    def _build_aggregates(self):
+        """Derive the incremental aggregates from the loaded history (once, at startup)"""
+        self.total_queries = sum(self.query_counter.values())
+        self.top_queries = TopKTracker.from_counts(config.ANALYTICS_TOP_K, self.query_counter)
+        self.top_unanswered = TopKTracker.from_counts(
+            config.ANALYTICS_TOP_K,
+            {question: info["count"] for question, info in self.unanswered_counter.items()}
+        )
+        
+        self.positive_feedback = 0
+        self.negative_feedback = 0
+        self.recent_feedback = deque(maxlen=config.ANALYTICS_RECENT_FEEDBACK)
+        self.recent_negative = deque(maxlen=config.ANALYTICS_RECENT_FEEDBACK)
+        for entry in sorted(self.feedback_data, key=lambda x: x.get("timestamp", "")):
+            self._add_feedback(entry)
+    
+    def _add_feedback(self, feedback_entry: Dict):
+        """Update running feedback counters and ring buffers (oldest first)"""
+        if feedback_entry.get("feedback") == "positive":
+            self.positive_feedback += 1
+        elif feedback_entry.get("feedback") == "negative":
+            self.negative_feedback += 1
+            self.recent_negative.append(feedback_entry)
+        self.recent_feedback.append(feedback_entry)
+    
+    def _record_rollup(self, counter: str, sketch: Optional[str] = None, key: Optional[str] = None):
+        """Count an event in the current hourly and daily buckets"""
+        now = datetime.utcnow()
+        for rollup in self.rollups.values():
+            rollup.increment(now, counter)
+            if sketch:
+                rollup.offer(now, sketch, key)
+    
+    def _snapshot(self) -> Dict:
+        """
+        Copy the current state for serialization
+        
+        The lock is held once per structure and only for flat, C-level copies
+        (dict copies, item lists, the feedback length), so logging is never
+        stalled for the whole snapshot. Converting the copies to JSON-ready
+        form - per-client sketches above all - happens outside the lock.
+        Events logged meanwhile may or may not be included; they are still
+        pending, so the next flush writes them.
+        """
+        with self._lock:
+            query_counter = self.query_counter.copy()
+        with self._lock:
+            unanswered = list(self.unanswered_counter.items())
+        with self._lock:
+            # Append-only: the first feedback_count entries never change
+            feedback_count = len(self.feedback_data)
+        with self._lock:
+            clients = list(self.client_sketches.clients.items())
+        with self._lock:
+            rollups = {
+                granularity: rollup.to_dict()
+                for granularity, rollup in self.rollups.items()
             }
-            
-            with open(self.storage_file, 'w', encoding='utf-8') as f:
+        with self._lock:
+            usage_clients = list(self.token_usage.by_client.items())
+            token_usage = self.token_usage.to_dict(include_clients=False)
+        
+        # Entries may be updated while copying; each copy is a consistent dict
+        token_usage["by_client"] = {client_id: dict(totals) for client_id, totals in usage_clients}
+        return {
+            "query_counter": query_counter,
+            "client_sketches": {client_id: stats.to_dict() for client_id, stats in clients},
+            "unanswered_counter": {question: dict(info) for question, info in unanswered},
+            "feedback_data": self.feedback_data[:feedback_count],
+            "rollups": rollups,
+            "token_usage": token_usage,
+            "last_updated": datetime.utcnow().isoformat()
+        }
+    
+    def _save_to_storage(self, data: Dict):
+        """Save analytics to persistent storage (temp file + atomic rename)"""
+        tmp_file = f"{self.storage_file}.tmp"
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_file, self.storage_file)
         except Exception as e:
             print(f"⚠ Could not save analytics: {e}")
     
+    def _mark_dirty(self):
+        """Record a buffered event; wake the flusher once enough have accumulated"""
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self._wake.set()
+    
+    def flush(self):
+        """Write buffered events to storage, if there are any"""
+        with self._write_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                # Reset first: events logged while copying count toward the next flush
+                self._pending = 0
+            self._save_to_storage(self._snapshot())
+    
+    def _flush_loop(self):
+        """Background flusher: runs until close()"""
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+    
+    def close(self):
+        """Stop the flusher and write any buffered events"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+    
     def log_query(self, question: str, confidence: str, client_id: str = "unknown"):
-        """Log a query for analytics and save to storage"""
+        """Log a query for analytics (persisted by the background flusher)"""
         now = datetime.utcnow().isoformat()
         
-        self.query_counter[question] += 1
-        self.client_query_counter[client_id][question] += 1
-        
-        if confidence == "low":
-            entry = self.unanswered_counter[question]
-            entry["count"] += 1
-            entry["first_seen"] = entry["first_seen"] or now
-            entry["last_seen"] = now
-        
-        # Save to persistent storage after each log
-        self._save_to_storage()
+        with self._lock:
+            self.query_counter[question] += 1
+            self.client_sketches.add(client_id, question)
+            self.total_queries += 1
+            self.top_queries.update(question, self.query_counter[question])
+            self._record_rollup("queries", "top_queries", question)
+            
+            if confidence == "low":
+                entry = self.unanswered_counter[question]
+                entry["count"] += 1
+                entry["first_seen"] = entry["first_seen"] or now
+                entry["last_seen"] = now
+                self.top_unanswered.update(question, entry["count"])
+                self._record_rollup("unanswered", "top_unanswered", question)
+            
+            # Persisted by the background flusher
+            self._mark_dirty()
     
-    def get_top_queries(self, limit: int = 10) -> List[Dict]:
-        """Get top queries"""
-        data = sorted(self.query_counter.items(), key=lambda x: x[1], reverse=True)[:limit]
+    def log_usage(self, endpoint: str, client_id: str, source_type: Optional[str],
+                  usage: Optional[Dict], reused: bool, latency_ms: int):
+        """Log the LLM token usage of a request (reused answers count as tokens saved)"""
+        with self._lock:
+            self.token_usage.record(endpoint, client_id, source_type, usage, reused, latency_ms)
+            self._mark_dirty()
+    
+    def get_token_usage(self, client_limit: int = 10) -> Dict:
+        """Token usage totals and averages per endpoint, per source_type and for the top clients"""
+        with self._lock:
+            return self.token_usage.summary(client_limit)
+    
+    def _window_rollup(self, window: str):
+        """Rollup and bucket count for a window like "24h" or "7d" (raises ValueError)"""
+        granularity, count = parse_window(window)
+        return self.rollups[granularity], count
+    
+    def get_top_queries(self, limit: int = 10, window: Optional[str] = None) -> List[Dict]:
+        """Get top queries, optionally within a recent time window (approximate)"""
+        if window:
+            rollup, count = self._window_rollup(window)
+            data = rollup.top("top_queries", count, datetime.utcnow(), limit)
+        else:
+            data = self.top_queries.top(limit)
         return [{"question": q, "count": c} for q, c in data]
     
-    def get_unanswered_questions(self, limit: int = 20) -> List[Dict]:
-        """Get unanswered questions"""
-        data = sorted(
-            self.unanswered_counter.items(),
-            key=lambda x: x[1]["count"],
-            reverse=True
-        )[:limit]
+    def get_unanswered_questions(self, limit: int = 20, window: Optional[str] = None) -> List[Dict]:
+        """Get unanswered questions, optionally within a recent time window (approximate)"""
+        if window:
+            rollup, count = self._window_rollup(window)
+            data = rollup.top("top_unanswered", count, datetime.utcnow(), limit)
+        else:
+            data = self.top_unanswered.top(limit)
         return [{
             "question": q,
-            "count": v["count"],
-            "first_seen": v["first_seen"],
-            "last_seen": v["last_seen"]
-        } for q, v in data]
+            "count": c,
+            "first_seen": self.unanswered_counter[q]["first_seen"] if q in self.unanswered_counter else None,
+            "last_seen": self.unanswered_counter[q]["last_seen"] if q in self.unanswered_counter else None
+        } for q, c in data]
     
-    def get_total_queries(self) -> int:
-        """Get total query count"""
-        return sum(self.query_counter.values())
+    def get_total_queries(self, window: Optional[str] = None) -> int:
+        """Get total query count, optionally within a recent time window"""
+        if window:
+            rollup, count = self._window_rollup(window)
+            return rollup.totals(count, datetime.utcnow()).get("queries", 0)
+        return self.total_queries
+    
+    def get_client_top_queries(self, client_id: str, limit: int = 5) -> Dict:
+        """Total and top queries of one client (counts are Count-Min estimates)"""
+        with self._lock:
+            total, data = self.client_sketches.top(client_id, limit)
+        return {
+            "total_queries": total,
+            "top_queries": [{"question": q, "count": c} for q, c in data]
+        }
+    
+    def get_rollups(self, granularity: str = "hourly", limit: int = 24) -> List[Dict]:
+        """Per-bucket counters (queries, unanswered, positive, negative), newest first"""
+        if granularity not in self.rollups:
+            raise ValueError(f"Invalid granularity '{granularity}' - use hourly or daily")
+        return self.rollups[granularity].series(limit)
     
     def log_feedback(self, feedback_entry: Dict):
-        """Log user feedback and save to storage"""
-        self.feedback_data.append(feedback_entry)
-        self._save_to_storage()
-    
-    def get_feedback_stats(self) -> Dict:
-        """Get feedback statistics"""
-        if not self.feedback_data:
-            return {
-                "total_feedback": 0,
-                "positive": 0,
-                "negative": 0,
-                "positive_rate": 0.0,
-                "recent_feedback": []
-            }
+        """Log user feedback (persisted by the background flusher)"""
+        with self._lock:
+            self.feedback_data.append(feedback_entry)
+            self._add_feedback(feedback_entry)
+            if feedback_entry.get("feedback") in ("positive", "negative"):
+                self._record_rollup(feedback_entry["feedback"])
+            self._mark_dirty()
+    
+    def get_feedback_stats(self, window: Optional[str] = None) -> Dict:
+        """Get feedback statistics, optionally within a recent time window"""
+        with self._lock:
+            entries = list(self.recent_feedback)
         
-        positive = sum(1 for f in self.feedback_data if f.get("feedback") == "positive")
-        negative = sum(1 for f in self.feedback_data if f.get("feedback") == "negative")
-        total = len(self.feedback_data)
+        if window:
+            rollup, count = self._window_rollup(window)
+            now = datetime.utcnow()
+            totals = rollup.totals(count, now)
+            positive = totals.get("positive", 0)
+            negative = totals.get("negative", 0)
+            total = positive + negative
+            start = rollup.window_start(count, now)
+            entries = [entry for entry in entries if entry.get("timestamp", "") >= start]
+        else:
+            positive = self.positive_feedback
+            negative = self.negative_feedback
+            total = len(self.feedback_data)
         
-        # Get recent feedback (last 20)
-        recent = sorted(
-            self.feedback_data,
-            key=lambda x: x.get("timestamp", ""),
-            reverse=True
-        )[:20]
+        # Recent feedback (last 20), newest first
+        recent = sorted(entries, key=lambda x: x.get("timestamp", ""), reverse=True)[:20]
         
         return {
             "total_feedback": total,
@@ -142,13 +345,8 @@ class Analytics:
         }
     
     def get_negative_feedback(self, limit: int = 20) -> List[Dict]:
-        """Get recent negative feedback for improvement"""
-        negative = [f for f in self.feedback_data if f.get("feedback") == "negative"]
-        return sorted(
-            negative,
-            key=lambda x: x.get("timestamp", ""),
-            reverse=True
-        )[:limit]
+        """Get recent negative feedback for improvement (up to ANALYTICS_RECENT_FEEDBACK entries)"""
+        return [self.recent_negative[-i] for i in range(1, min(limit, len(self.recent_negative)) + 1)]
 
 # Global analytics instance with persistent storage
 analytics = Analytics()
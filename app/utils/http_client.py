@@ -0,0 +1,66 @@
+# app/utils/http_client.py
+import importlib.util
+from typing import Dict, Any, Optional
+
+import httpx
+
+
+def create_async_client(
+    max_connections: int,
+    max_keepalive_connections: int,
+    keepalive_expiry: float,
+    connect_timeout: float,
+    read_timeout: float,
+    http2: bool = False,
+    transport: Optional[httpx.AsyncBaseTransport] = None
+) -> httpx.AsyncClient:
+    """
+    Create a long-lived pooled AsyncClient
+
+    HTTP/2 is only enabled when the optional 'h2' package is installed.
+    """
+    if http2 and importlib.util.find_spec("h2") is None:
+        print("⚠ HTTP/2 requested but 'h2' is not installed - falling back to HTTP/1.1")
+        http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        ),
+        timeout=httpx.Timeout(
+            connect=connect_timeout,
+            read=read_timeout,
+            write=read_timeout,
+            pool=connect_timeout
+        ),
+        transport=transport
+    )
+
+
+def get_pool_stats(client: Optional[httpx.AsyncClient]) -> Dict[str, Any]:
+    """Connection pool statistics (in-use and idle connections) for a client"""
+    if client is None:
+        return {"status": "not_started"}
+    if client.is_closed:
+        return {"status": "closed"}
+
+    pool = getattr(client._transport, "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is None:
+        # Custom transport (e.g. tests or benchmarks) without an httpcore pool
+        return {"status": "open"}
+
+    idle = sum(1 for conn in connections if conn.is_idle())
+    in_use = sum(1 for conn in connections if not conn.is_idle() and not conn.is_closed())
+    http2 = sum(1 for conn in connections if "HTTP/2" in conn.info())
+
+    return {
+        "status": "open",
+        "connections": len(connections),
+        "in_use": in_use,
+        "idle": idle,
+        "http2_connections": http2
+    }
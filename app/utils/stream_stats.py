@@ -0,0 +1,354 @@
+# app/utils/stream_stats.py
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+
+class TopKTracker:
+    """
+    Exact top-K over counters that only increase
+
+    The caller owns the full counts and reports each key's new count. Because
+    counts never decrease, a key outside the tracked set can only enter it by
+    overtaking the current minimum, so updates are O(1) unless the set changes.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self._min: Optional[Tuple[str, int]] = None
+
+    def _find_min(self) -> Optional[Tuple[str, int]]:
+        if self._min is None and self.counts:
+            key = min(self.counts, key=self.counts.get)
+            self._min = (key, self.counts[key])
+        return self._min
+
+    def update(self, key: str, count: int):
+        """Report the new count of a key"""
+        if key in self.counts:
+            self.counts[key] = count
+            if self._min is not None and self._min[0] == key:
+                self._min = None
+            return
+
+        if len(self.counts) < self.capacity:
+            self.counts[key] = count
+            if self._min is not None and count < self._min[1]:
+                self._min = (key, count)
+            return
+
+        min_key, min_count = self._find_min()
+        if count > min_count:
+            del self.counts[min_key]
+            self.counts[key] = count
+            self._min = None
+
+    def top(self, limit: int) -> List[Tuple[str, int]]:
+        """Highest counts first"""
+        return sorted(self.counts.items(), key=lambda x: x[1], reverse=True)[:limit]
+
+    @classmethod
+    def from_counts(cls, capacity: int, counts: Dict[str, int]) -> "TopKTracker":
+        """Seed a tracker from existing counts"""
+        tracker = cls(capacity)
+        for key, count in counts.items():
+            tracker.update(key, count)
+        return tracker
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitters sketch with a fixed number of counters
+
+    Any key whose true count exceeds total / capacity is guaranteed to be
+    tracked; reported counts overestimate by at most the stored error.
+    """
+
+    def __init__(self, capacity: int, counters: Optional[Dict[str, List[int]]] = None):
+        self.capacity = capacity
+        # key -> [count, error]
+        self.counters: Dict[str, List[int]] = counters or {}
+
+    def offer(self, key: str, increment: int = 1):
+        counter = self.counters.get(key)
+        if counter is not None:
+            counter[0] += increment
+        elif len(self.counters) < self.capacity:
+            self.counters[key] = [increment, 0]
+        else:
+            # Replace the smallest counter; the newcomer inherits its count as error
+            min_key = min(self.counters, key=lambda k: self.counters[k][0])
+            min_count = self.counters.pop(min_key)[0]
+            self.counters[key] = [min_count + increment, min_count]
+
+    def top(self, limit: int) -> List[Tuple[str, int]]:
+        items = sorted(self.counters.items(), key=lambda x: x[1][0], reverse=True)[:limit]
+        return [(key, counter[0]) for key, counter in items]
+
+    @staticmethod
+    def merge_top(sketches: Iterable["SpaceSaving"], limit: int) -> List[Tuple[str, int]]:
+        """Approximate top keys across several sketches (e.g. time buckets)"""
+        totals: Dict[str, int] = {}
+        for sketch in sketches:
+            for key, (count, _) in sketch.counters.items():
+                totals[key] = totals.get(key, 0) + count
+        return sorted(totals.items(), key=lambda x: x[1], reverse=True)[:limit]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: list(counter) for key, counter in self.counters.items()}
+
+    @classmethod
+    def from_dict(cls, capacity: int, data: Dict[str, List[int]]) -> "SpaceSaving":
+        return cls(capacity, {key: list(counter) for key, counter in data.items()})
+
+
+# Bucket key formats; keys sort chronologically as strings
+BUCKET_FORMATS = {"hourly": "%Y-%m-%dT%H", "daily": "%Y-%m-%d"}
+BUCKET_SPANS = {"hourly": timedelta(hours=1), "daily": timedelta(days=1)}
+WINDOW_UNITS = {"h": "hourly", "d": "daily"}
+
+
+def parse_window(window: str) -> Tuple[str, int]:
+    """Parse a window like "24h" or "7d" into (granularity, bucket count)"""
+    window = window.strip().lower()
+    granularity = WINDOW_UNITS.get(window[-1:])
+    if granularity is None or not window[:-1].isdigit() or int(window[:-1]) < 1:
+        raise ValueError(f"Invalid window '{window}' - use e.g. 24h or 7d")
+    return granularity, int(window[:-1])
+
+
+class TimeBucketRollup:
+    """
+    Fixed-granularity time buckets of counters plus small heavy-hitter sketches
+
+    Only the most recent `retention` buckets are kept, so memory and query cost
+    are bounded regardless of history size.
+    """
+
+    def __init__(self, granularity: str, retention: int, sketch_capacity: int):
+        self.granularity = granularity
+        self.retention = retention
+        self.sketch_capacity = sketch_capacity
+        self.buckets: Dict[str, Dict[str, Any]] = {}
+
+    def _bucket_key(self, when: datetime) -> str:
+        return when.strftime(BUCKET_FORMATS[self.granularity])
+
+    def _new_bucket(self) -> Dict[str, Any]:
+        return {
+            "counters": {},
+            "sketches": {}
+        }
+
+    def _bucket(self, when: datetime) -> Dict[str, Any]:
+        key = self._bucket_key(when)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = self._new_bucket()
+            # A new bucket is the only time old ones can fall out of retention
+            if len(self.buckets) > self.retention:
+                for old_key in sorted(self.buckets)[:len(self.buckets) - self.retention]:
+                    del self.buckets[old_key]
+        return bucket
+
+    def increment(self, when: datetime, counter: str, amount: int = 1):
+        counters = self._bucket(when)["counters"]
+        counters[counter] = counters.get(counter, 0) + amount
+
+    def offer(self, when: datetime, sketch: str, key: str):
+        sketches = self._bucket(when)["sketches"]
+        if sketch not in sketches:
+            sketches[sketch] = SpaceSaving(self.sketch_capacity)
+        sketches[sketch].offer(key)
+
+    def window_start(self, count: int, now: datetime) -> str:
+        """Key of the oldest bucket in the last `count` periods; ISO timestamps >= it fall inside"""
+        return self._bucket_key(now - BUCKET_SPANS[self.granularity] * (count - 1))
+
+    def window(self, count: int, now: datetime) -> List[Dict[str, Any]]:
+        """Buckets covering the last `count` periods up to now"""
+        cutoff = self.window_start(count, now)
+        return [bucket for key, bucket in self.buckets.items() if key >= cutoff]
+
+    def totals(self, count: int, now: datetime) -> Dict[str, int]:
+        """Summed counters over a window"""
+        totals: Dict[str, int] = {}
+        for bucket in self.window(count, now):
+            for counter, value in bucket["counters"].items():
+                totals[counter] = totals.get(counter, 0) + value
+        return totals
+
+    def top(self, sketch: str, count: int, now: datetime, limit: int) -> List[Tuple[str, int]]:
+        """Approximate top keys of a sketch over a window"""
+        sketches = [b["sketches"][sketch] for b in self.window(count, now) if sketch in b["sketches"]]
+        return SpaceSaving.merge_top(sketches, limit)
+
+    def series(self, limit: int) -> List[Dict[str, Any]]:
+        """Counters of the most recent buckets, newest first"""
+        keys = sorted(self.buckets, reverse=True)[:limit]
+        return [{"bucket": key, **self.buckets[key]["counters"]} for key in keys]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            key: {
+                "counters": dict(bucket["counters"]),
+                "sketches": {name: sketch.to_dict() for name, sketch in bucket["sketches"].items()}
+            }
+            for key, bucket in self.buckets.items()
+        }
+
+    def load(self, data: Dict[str, Any]):
+        for key, bucket in data.items():
+            self.buckets[key] = {
+                "counters": dict(bucket.get("counters", {})),
+                "sketches": {
+                    name: SpaceSaving.from_dict(self.sketch_capacity, counters)
+                    for name, counters in bucket.get("sketches", {}).items()
+                }
+            }
+
+
+class CountMinSketch:
+    """
+    Count-Min Sketch: fixed-size frequency estimates that never undercount
+
+    Estimates overcount by at most 2 * total / width with probability
+    1 - 0.5 ** depth.
+    """
+
+    def __init__(self, width: int, depth: int):
+        self.width = width
+        self.depth = depth
+        self.table = array('I', bytes(4 * width * depth))
+
+    def _indexes(self, key: str) -> List[int]:
+        data = key.encode('utf-8')
+        return [row * self.width + zlib.crc32(data, row) % self.width for row in range(self.depth)]
+
+    def add(self, key: str, increment: int = 1) -> int:
+        """Count a key and return its new estimate"""
+        indexes = self._indexes(key)
+        for index in indexes:
+            self.table[index] += increment
+        return min(self.table[index] for index in indexes)
+
+    def estimate(self, key: str) -> int:
+        return min(self.table[index] for index in self._indexes(key))
+
+    def to_sparse(self) -> List[List[int]]:
+        """Non-zero cells as [index, value] pairs (most cells are zero for small clients)"""
+        return [[index, value] for index, value in enumerate(self.table) if value]
+
+    def load_sparse(self, cells: List[List[int]]):
+        for index, value in cells:
+            self.table[index] = value
+
+
+class ClientQueryStats:
+    """Per-client query frequencies: a Count-Min Sketch plus the top-K estimated queries"""
+
+    def __init__(self, width: int, depth: int, top_k: int):
+        self.sketch = CountMinSketch(width, depth)
+        self.top_k = top_k
+        self.top: Dict[str, int] = {}
+        self.total = 0
+        self.last_seen = 0.0
+
+    def add(self, question: str, increment: int = 1):
+        estimate = self.sketch.add(question, increment)
+        self.total += increment
+        self.last_seen = time.time()
+
+        if question in self.top or len(self.top) < self.top_k:
+            self.top[question] = estimate
+            return
+        min_question = min(self.top, key=self.top.get)
+        if estimate > self.top[min_question]:
+            del self.top[min_question]
+            self.top[question] = estimate
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "last_seen": self.last_seen,
+            "top": dict(self.top),
+            "sketch": self.sketch.to_sparse()
+        }
+
+    @classmethod
+    def from_dict(cls, width: int, depth: int, top_k: int, data: Dict[str, Any]) -> "ClientQueryStats":
+        stats = cls(width, depth, top_k)
+        stats.total = data.get("total", 0)
+        stats.last_seen = data.get("last_seen", 0.0)
+        stats.top = dict(sorted(data.get("top", {}).items(), key=lambda x: x[1], reverse=True)[:top_k])
+        stats.sketch.load_sparse(data.get("sketch", []))
+        return stats
+
+
+class ClientSketches:
+    """
+    Bounded map of client id -> ClientQueryStats
+
+    The number of clients is derived from a memory budget; the least recently
+    active client is evicted when the budget is full, and clients idle for
+    longer than idle_seconds are dropped.
+    """
+
+    def __init__(self, memory_budget: int, width: int, depth: int, top_k: int, idle_seconds: float):
+        self.width = width
+        self.depth = depth
+        self.top_k = top_k
+        self.idle_seconds = idle_seconds
+        # Sketch table plus a rough allowance for the top-K entries
+        self.bytes_per_client = 4 * width * depth + 200 * top_k
+        self.max_clients = max(1, memory_budget // self.bytes_per_client)
+
+        # Least recently active first
+        self.clients: "OrderedDict[str, ClientQueryStats]" = OrderedDict()
+        self.evictions = 0
+
+    def _evict(self):
+        cutoff = time.time() - self.idle_seconds
+        while self.clients:
+            oldest = next(iter(self.clients.values()))
+            if len(self.clients) <= self.max_clients and oldest.last_seen >= cutoff:
+                break
+            self.clients.popitem(last=False)
+            self.evictions += 1
+
+    def add(self, client_id: str, question: str, increment: int = 1):
+        stats = self.clients.get(client_id)
+        if stats is None:
+            stats = self.clients[client_id] = ClientQueryStats(self.width, self.depth, self.top_k)
+        else:
+            self.clients.move_to_end(client_id)
+        stats.add(question, increment)
+        self._evict()
+
+    def top(self, client_id: str, limit: int) -> Tuple[int, List[Tuple[str, int]]]:
+        """(total queries, top estimated queries) for a client"""
+        stats = self.clients.get(client_id)
+        if stats is None:
+            return 0, []
+        return stats.total, sorted(stats.top.items(), key=lambda x: x[1], reverse=True)[:limit]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "clients": len(self.clients),
+            "max_clients": self.max_clients,
+            "bytes_per_client": self.bytes_per_client,
+            "evictions": self.evictions
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {client_id: stats.to_dict() for client_id, stats in self.clients.items()}
+
+    def load(self, data: Dict[str, Any]):
+        rows = sorted(data.items(), key=lambda x: x[1].get("last_seen", 0.0))
+        for client_id, stats in rows:
+            self.clients[client_id] = ClientQueryStats.from_dict(self.width, self.depth, self.top_k, stats)
+        self._evict()
@@ -0,0 +1,102 @@
+# app/utils/usage_stats.py
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+TOKEN_FIELDS = ("prompt_tokens", "output_tokens", "thinking_tokens", "total_tokens")
+
+
+def _empty_totals() -> Dict[str, int]:
+    totals = {"requests": 0, "llm_calls": 0, "reused": 0, "tokens_saved": 0, "latency_ms": 0}
+    totals.update({field: 0 for field in TOKEN_FIELDS})
+    return totals
+
+
+def _with_averages(totals: Dict[str, int]) -> Dict[str, Any]:
+    """Totals plus per-call token and per-request latency averages"""
+    calls = totals["llm_calls"]
+    result = dict(totals)
+    for field in TOKEN_FIELDS:
+        result[f"avg_{field}"] = round(totals[field] / calls, 1) if calls else 0.0
+    result["avg_latency_ms"] = round(totals["latency_ms"] / totals["requests"], 1) if totals["requests"] else 0.0
+    return result
+
+
+class UsageLedger:
+    """
+    LLM token usage totals per endpoint, per source_type and per client
+
+    Requests answered by a fresh LLM call add their reported usage. Reused
+    answers (response cache hits, or joining an identical in-flight request)
+    cost nothing; the usage stored with the answer counts as tokens_saved.
+    Clients are kept in least-recently-seen order, at most max_clients.
+    """
+
+    def __init__(self, max_clients: int):
+        self.max_clients = max_clients
+        self.by_endpoint: Dict[str, Dict[str, int]] = {}
+        self.by_source_type: Dict[str, Dict[str, int]] = {}
+        self.by_client: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        self.evicted_clients = 0
+
+    def _client_totals(self, client_id: str) -> Dict[str, int]:
+        totals = self.by_client.get(client_id)
+        if totals is None:
+            totals = self.by_client[client_id] = _empty_totals()
+            while len(self.by_client) > self.max_clients:
+                self.by_client.popitem(last=False)
+                self.evicted_clients += 1
+        else:
+            self.by_client.move_to_end(client_id)
+        return totals
+
+    def record(self, endpoint: str, client_id: str, source_type: Optional[str],
+               usage: Optional[Dict[str, int]], reused: bool, latency_ms: int):
+        groups = [
+            self.by_endpoint.setdefault(endpoint, _empty_totals()),
+            self.by_source_type.setdefault(source_type or "none", _empty_totals()),
+            self._client_totals(client_id)
+        ]
+        for totals in groups:
+            totals["requests"] += 1
+            totals["latency_ms"] += latency_ms
+            if reused:
+                totals["reused"] += 1
+                if usage:
+                    totals["tokens_saved"] += usage.get("total_tokens", 0)
+            elif usage:
+                totals["llm_calls"] += 1
+                for field in TOKEN_FIELDS:
+                    totals[field] += usage.get(field, 0)
+
+    def summary(self, client_limit: int = 10) -> Dict[str, Any]:
+        top_clients: List[Dict[str, Any]] = [
+            {"client_id": client_id, **_with_averages(totals)}
+            for client_id, totals in sorted(self.by_client.items(), key=lambda x: x[1]["total_tokens"], reverse=True)[:client_limit]
+        ]
+        return {
+            "by_endpoint": {name: _with_averages(totals) for name, totals in self.by_endpoint.items()},
+            "by_source_type": {name: _with_averages(totals) for name, totals in self.by_source_type.items()},
+            "top_clients": top_clients,
+            "tracked_clients": len(self.by_client),
+            "evicted_clients": self.evicted_clients
+        }
+
+    def to_dict(self, include_clients: bool = True) -> Dict[str, Any]:
+        """Serializable totals; include_clients=False leaves out the (large) per-client map"""
+        data = {
+            "by_endpoint": {name: dict(totals) for name, totals in self.by_endpoint.items()},
+            "by_source_type": {name: dict(totals) for name, totals in self.by_source_type.items()},
+            "evicted_clients": self.evicted_clients
+        }
+        if include_clients:
+            data["by_client"] = {name: dict(totals) for name, totals in self.by_client.items()}
+        return data
+
+    def load(self, data: Dict[str, Any]):
+        for name in ("by_endpoint", "by_source_type", "by_client"):
+            target = getattr(self, name)
+            for key, totals in data.get(name, {}).items():
+                target[key] = {**_empty_totals(), **totals}
+        while len(self.by_client) > self.max_clients:
+            self.by_client.popitem(last=False)
+        self.evicted_clients = data.get("evicted_clients", 0)
@@ -0,0 +1,7 @@
+"""
+Offline benchmarks for the chat pipeline
+
+FakeLLMClient and FakeDocsSite stand in for Gemini and the documentation site,
+so RAGService and the API endpoints can be measured without network access.
+Run with run_benchmarks.py.
+"""
@@ -0,0 +1,29 @@
+# benchmarks/cli.py
+import argparse
+from typing import Tuple
+
+
+def add_fake_service_arguments(parser: argparse.ArgumentParser):
+    """Options shared by the scripts that run the service against the fakes"""
+    group = parser.add_argument_group("fake LLM and docs site")
+    group.add_argument("--llm-latency", default="lognormal:200:0.3",
+                       help="fixed:MS, uniform:LOW:HIGH or lognormal:MEDIAN:SIGMA (default: %(default)s)")
+    group.add_argument("--output-tokens", type=int, default=300, help="Fake LLM answer size (default: %(default)s)")
+    group.add_argument("--docs-latency", default="lognormal:50:0.3", help="Docs site latency spec (default: %(default)s)")
+    group.add_argument("--doc-sections", type=int, default=12, help="Sections per fake docs page (default: %(default)s)")
+    group.add_argument("--docs-validators", action="store_true", help="Serve ETags and answer revalidations with 304")
+    group.add_argument("--seed", type=int, default=0, help="Random seed for latencies (default: %(default)s)")
+    group.add_argument("--keep-workspace", action="store_true", help="Keep the scratch directory for inspection")
+    group.add_argument("--verbose", action="store_true", help="Show the service's own log output")
+
+
+def build_fakes(args: argparse.Namespace) -> Tuple["FakeLLMClient", "FakeDocsSite"]:
+    """FakeLLMClient and FakeDocsSite configured from add_fake_service_arguments options"""
+    from benchmarks.fake_docs import FakeDocsSite
+    from benchmarks.fake_llm import FakeLLMClient
+    from benchmarks.latency import LatencyModel
+
+    llm = FakeLLMClient(LatencyModel(args.llm_latency), output_tokens=args.output_tokens, seed=args.seed)
+    site = FakeDocsSite(LatencyModel(args.docs_latency), sections=args.doc_sections,
+                        validators=args.docs_validators, seed=args.seed)
+    return llm, site
@@ -0,0 +1,104 @@
+# benchmarks/fake_docs.py
+import asyncio
+import random
+import zlib
+from typing import Dict, Any
+
+import httpx
+
+from benchmarks.latency import LatencyModel
+
+PROSE = [
+    "Send the request with your API key in the header.",
+    "The response lists every matching hotel with its rates.",
+    "Use the token from the previous call to continue the session.",
+    "Rates are returned per room and include taxes and fees.",
+    "Cancellation policies depend on the supplier and the rate.",
+    "Optional filters narrow the results before pricing.",
+    "Requests time out after thirty seconds without a response.",
+    "Every booking has a reference that identifies it later."
+]
+
+ERROR_MESSAGES = [
+    "Invalid request parameters", "Session expired", "Hotel sold out",
+    "Price changed", "Booking not found", "Supplier unavailable"
+]
+
+
+class FakeDocsSite:
+    """
+    Local stand-in for the documentation site, served over httpx.MockTransport
+
+    Every path returns a deterministic HTML page built from its slug: headed
+    sections of prose, JSON code samples and an error code table, so pages go
+    through the same parse/chunk path as the real site. With validators on,
+    responses carry an ETag and matching conditional requests get a 304.
+    """
+
+    def __init__(self, latency: LatencyModel, sections: int = 12, validators: bool = False, seed: int = 0):
+        self.latency = latency
+        self.sections = sections
+        self.validators = validators
+        self._rng = random.Random(seed)
+        self._pages: Dict[str, str] = {}
+
+        # Counters
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+
+    def reset_stats(self):
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+
+    def render(self, slug: str) -> str:
+        """HTML for a page slug (built once, then reused)"""
+        if slug in self._pages:
+            return self._pages[slug]
+
+        rng = random.Random(zlib.crc32(slug.encode('utf-8')))
+        title = slug.replace('-', ' ').replace('_', ' ').title()
+        parts = [f"<html><head><title>{title}</title><style>p {{margin: 0}}</style></head><body>",
+                 "<nav><a href='/docs'>Docs</a></nav>", f"<h1>{title}</h1>"]
+        for i in range(self.sections):
+            parts.append(f"<h2>{title} section {i + 1}</h2>")
+            parts.extend(f"<p>{rng.choice(PROSE)} This applies to {title.lower()}.</p>" for _ in range(4))
+            if i % 3 == 1:
+                parts.append(f'<pre>{{"{slug.replace("-", "_")}": {{"id": {i}, "status": "ok"}}}}</pre>')
+        parts.append("<h2>Error Codes</h2><table><tr><th>Error Code</th><th>Error Message</th></tr>")
+        for message in ERROR_MESSAGES:
+            parts.append(f"<tr><td>{rng.randint(1000, 5999)}</td><td>{message}</td></tr>")
+        parts.append("</table><footer>ZentrumHub</footer></body></html>")
+
+        html = "\n".join(parts)
+        self._pages[slug] = html
+        return html
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(self.latency.sample(self._rng))
+        self.requests += 1
+
+        slug = request.url.path.rstrip('/').rsplit('/', 1)[-1]
+        html = self.render(slug)
+        headers: Dict[str, Any] = {"content-type": "text/html; charset=utf-8"}
+        if self.validators:
+            etag = f'"{zlib.crc32(html.encode("utf-8")):08x}"'
+            if request.headers.get('if-none-match') == etag:
+                self.not_modified += 1
+                return httpx.Response(304, headers={"etag": etag})
+            headers["etag"] = etag
+
+        self.bytes_sent += len(html)
+        return httpx.Response(200, headers=headers, text=html)
+
+    def client(self) -> httpx.AsyncClient:
+        """Async client whose requests are answered by this site"""
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handle), follow_redirects=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "bytes_sent": self.bytes_sent
+        }
@@ -0,0 +1,101 @@
+# benchmarks/fake_llm.py
+import asyncio
+import random
+import zlib
+from typing import Dict, Any, AsyncIterator, List
+
+from app.llm.llm_client import LLMClient, LLMResult, TokenUsage
+from app.services.chunker import CHARS_PER_TOKEN, estimate_tokens
+from benchmarks.latency import LatencyModel
+
+# Answer vocabulary - plain documentation prose, never one of the "not found" phrases
+VOCABULARY = [
+    "the", "search", "request", "returns", "hotel", "rates", "booking", "token", "call",
+    "endpoint", "with", "your", "api", "key", "use", "response", "field", "room", "price",
+    "cancel", "policy", "before", "after", "check", "status", "id", "parameter", "value",
+    "session", "supplier", "currency", "include", "header", "required", "optional"
+]
+
+WORDS_PER_LINE = 12
+WORDS_PER_STREAM_CHUNK = 8
+
+
+class FakeLLMClient(LLMClient):
+    """
+    Deterministic offline LLM client for benchmarks
+
+    Each call waits for a latency drawn from the latency model, then returns about
+    output_tokens tokens of text. The same prompt always yields the same answer,
+    and the latency sequence is reproducible for a given seed. Token usage is
+    reported from the chunker's estimate, with no thinking tokens.
+    """
+
+    def __init__(self, latency: LatencyModel, output_tokens: int = 300, seed: int = 0):
+        self.latency = latency
+        self.output_tokens = output_tokens
+        self._rng = random.Random(seed)
+
+        # Counters
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def reset_stats(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def _answer_words(self, prompt: str) -> List[str]:
+        rng = random.Random(zlib.crc32(prompt.encode('utf-8')))
+        words = []
+        size = 0
+        while size < self.output_tokens * CHARS_PER_TOKEN:
+            word = rng.choice(VOCABULARY)
+            words.append(word)
+            size += len(word) + 1
+        return words
+
+    def _record(self, prompt: str, answer: str) -> TokenUsage:
+        usage = TokenUsage(prompt_tokens=estimate_tokens(prompt), output_tokens=estimate_tokens(answer))
+        usage.total_tokens = usage.prompt_tokens + usage.output_tokens
+        self.calls += 1
+        self.prompt_tokens += usage.prompt_tokens
+        self.completion_tokens += usage.output_tokens
+        return usage
+
+    async def generate(self, prompt: str) -> str:
+        return (await self.complete(prompt)).text
+
+    async def complete(self, prompt: str) -> LLMResult:
+        await asyncio.sleep(self.latency.sample(self._rng))
+        words = self._answer_words(prompt)
+        answer = "\n".join(
+            " ".join(words[i:i + WORDS_PER_LINE]) for i in range(0, len(words), WORDS_PER_LINE)
+        )
+        return LLMResult(answer, self._record(prompt, answer))
+
+    async def generate_stream(self, prompt: str) -> AsyncIterator[str]:
+        async for chunk in self.complete_stream(prompt):
+            if chunk.text:
+                yield chunk.text
+
+    async def complete_stream(self, prompt: str) -> AsyncIterator[LLMResult]:
+        """Spreads the sampled latency evenly over the streamed chunks"""
+        words = self._answer_words(prompt)
+        chunks = [
+            " ".join(words[i:i + WORDS_PER_STREAM_CHUNK]) + " "
+            for i in range(0, len(words), WORDS_PER_STREAM_CHUNK)
+        ]
+        delay = self.latency.sample(self._rng) / max(1, len(chunks))
+        for chunk in chunks:
+            await asyncio.sleep(delay)
+            yield LLMResult(chunk)
+        yield LLMResult("", self._record(prompt, "".join(chunks)))
+
+    def get_model_info(self) -> Dict[str, Any]:
+        return {
+            "provider": "Benchmark",
+            "model": "fake-llm",
+            "latency": repr(self.latency),
+            "output_tokens": self.output_tokens
+        }
@@ -0,0 +1,57 @@
+# benchmarks/fake_server.py
+import contextlib
+import os
+
+from fastapi import FastAPI
+from fastapi.responses import Response
+
+from app.config import config
+from app.controllers import chat_controller
+from app.services.rag_service import RAGService
+from app.utils.analytics import analytics
+from app.utils import metrics
+from benchmarks.fake_docs import FakeDocsSite
+from benchmarks.fake_llm import FakeLLMClient
+
+
+@contextlib.contextmanager
+def quiet(enabled: bool = True):
+    """Silence the service's progress prints while benchmarking"""
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def build_rag_service(llm: FakeLLMClient, site: FakeDocsSite, verbose: bool = False) -> RAGService:
+    """RAGService answering with the fake LLM, its documentation requests served by the fake site"""
+    with quiet(not verbose):
+        rag = RAGService(llm)
+    rag.doc_fetcher._client = site.client()
+    return rag
+
+
+async def shutdown_rag_service(rag: RAGService):
+    """Release what app/main.py releases on shutdown"""
+    await rag.doc_fetcher.aclose()
+    rag.doc_fetcher.page_store.close()
+    rag.cache_service.close()
+    analytics.close()
+
+
+def create_app(rag: RAGService) -> FastAPI:
+    """The /api router on a bare app, wired to the given service"""
+    app = FastAPI(title=f"{config.API_TITLE} (benchmark)", version=config.API_VERSION)
+    chat_controller.set_rag_service(rag)
+    app.include_router(chat_controller.router)
+
+    @app.get("/metrics")
+    async def prometheus_metrics():
+        return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+    @app.on_event("shutdown")
+    async def shutdown():
+        await shutdown_rag_service(rag)
+
+    return app
@@ -0,0 +1,37 @@
+# benchmarks/latency.py
+import math
+import random
+
+
+class LatencyModel:
+    """
+    Latency distribution parsed from a spec string (all times in milliseconds)
+
+        fixed:MS                  always MS
+        uniform:LOW:HIGH          uniformly between LOW and HIGH
+        lognormal:MEDIAN:SIGMA    log-normal around MEDIAN - the long tail of real APIs
+    """
+
+    KINDS = {"fixed": 1, "uniform": 2, "lognormal": 2}
+
+    def __init__(self, spec: str):
+        kind, *params = spec.split(":")
+        if kind not in self.KINDS or len(params) != self.KINDS[kind]:
+            raise ValueError(f"Invalid latency spec '{spec}' (expected fixed:MS, uniform:LOW:HIGH or lognormal:MEDIAN:SIGMA)")
+        self.spec = spec
+        self.kind = kind
+        self.params = [float(p) for p in params]
+
+    def sample(self, rng: random.Random) -> float:
+        """One latency in seconds"""
+        if self.kind == "fixed":
+            ms = self.params[0]
+        elif self.kind == "uniform":
+            ms = rng.uniform(*self.params)
+        else:
+            median, sigma = self.params
+            ms = median * math.exp(rng.gauss(0.0, sigma)) if median > 0 else 0.0
+        return max(0.0, ms) / 1000.0
+
+    def __repr__(self) -> str:
+        return self.spec
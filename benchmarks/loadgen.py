@@ -0,0 +1,178 @@
+# benchmarks/loadgen.py
+import asyncio
+import random
+import time
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+import httpx
+
+from benchmarks.report import percentile
+from benchmarks.workload import QueryDistribution
+
+# Upper bounds (ms) of the latency histogram buckets; slower requests fall in the last, open bucket
+HISTOGRAM_BOUNDS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+
+class RequestResult:
+    """Outcome of one replayed request"""
+
+    __slots__ = ("endpoint", "latency", "status", "error", "cache_tier")
+
+    def __init__(self, endpoint: str, latency: float, status: Optional[int] = None,
+                 error: Optional[str] = None, cache_tier: Optional[str] = None):
+        self.endpoint = endpoint
+        self.latency = latency
+        self.status = status
+        self.error = error
+        self.cache_tier = cache_tier
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status == 200
+
+
+class LoadGenerator:
+    """
+    Replays a QueryDistribution against /api/chat and /api/explain
+
+    Two modes:
+        run_rate         open loop - requests start on a Poisson schedule at the target
+                         rate whether or not earlier ones finished; latency is measured
+                         from the scheduled start, so a stalled server is not hidden by
+                         the generator slowing down with it
+        run_concurrency  closed loop - a fixed number of clients, each sending its next
+                         request as soon as the previous one completes
+    """
+
+    def __init__(self, client: httpx.AsyncClient, workload: QueryDistribution, seed: int = 0):
+        self.client = client
+        self.workload = workload
+        self._rng = random.Random(seed)
+        self.results: List[RequestResult] = []
+        self.wall_seconds = 0.0
+
+    async def _send(self, started: float) -> RequestResult:
+        client_id, query, is_explain = self.workload.sample()
+        if is_explain:
+            endpoint = "explain"
+            request = self.client.post("/api/explain", json={"input_type": "error_code", "content": query, "client_id": client_id})
+        else:
+            endpoint = "chat"
+            request = self.client.post("/api/chat", json={"question": query, "conversation_id": client_id})
+
+        try:
+            response = await request
+        except Exception as e:
+            return RequestResult(endpoint, time.perf_counter() - started, error=f"{type(e).__name__}: {e}")
+
+        cache_tier = None
+        if response.status_code == 200 and endpoint == "chat":
+            cache_tier = response.json().get("cache_tier")
+        return RequestResult(endpoint, time.perf_counter() - started, status=response.status_code, cache_tier=cache_tier)
+
+    async def run_rate(self, rps: float, duration: float, max_requests: Optional[int] = None,
+                       max_in_flight: int = 1000):
+        """Open loop at rps requests/second for duration seconds (or max_requests requests)"""
+        in_flight = set()
+        start = time.perf_counter()
+        scheduled = start
+        sent = 0
+        while max_requests is None or sent < max_requests:
+            scheduled += self._rng.expovariate(rps)
+            if scheduled - start > duration:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            if len(in_flight) >= max_in_flight:
+                # Server cannot keep up - record the drop instead of queueing without bound
+                self.results.append(RequestResult("dropped", 0.0, error="too many requests in flight"))
+            else:
+                task = asyncio.create_task(self._send(scheduled))
+                task.add_done_callback(lambda t: (in_flight.discard(t), self.results.append(t.result())))
+                in_flight.add(task)
+            sent += 1
+
+        if in_flight:
+            await asyncio.wait(in_flight)
+        self.wall_seconds = time.perf_counter() - start
+
+    async def run_concurrency(self, concurrency: int, duration: float, max_requests: Optional[int] = None):
+        """Closed loop with concurrency clients for duration seconds (or max_requests requests)"""
+        start = time.perf_counter()
+        deadline = start + duration
+        sent = 0
+
+        async def client_loop():
+            nonlocal sent
+            while time.perf_counter() < deadline and (max_requests is None or sent < max_requests):
+                sent += 1
+                self.results.append(await self._send(time.perf_counter()))
+
+        await asyncio.gather(*[client_loop() for _ in range(concurrency)])
+        self.wall_seconds = time.perf_counter() - start
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-endpoint latency percentiles, histogram, error rate and chat cache tiers"""
+        endpoints: Dict[str, Any] = {}
+        for endpoint in ["all", "chat", "explain"]:
+            results = [r for r in self.results if r.endpoint != "dropped" and endpoint in ("all", r.endpoint)]
+            if not results:
+                continue
+            latencies = [r.latency * 1000 for r in results if r.ok]
+            errors = [r for r in results if not r.ok]
+            endpoints[endpoint] = {
+                "requests": len(results),
+                "errors": len(errors),
+                "error_rate": round(len(errors) / len(results), 4),
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p95_ms": round(percentile(latencies, 95), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+                "max_ms": round(max(latencies), 2) if latencies else 0.0,
+                "histogram": histogram(latencies),
+                "error_kinds": dict(Counter(r.error or f"HTTP {r.status}" for r in errors).most_common(5))
+            }
+
+        completed = [r for r in self.results if r.endpoint != "dropped"]
+        tiers = Counter(r.cache_tier or "miss" for r in completed if r.endpoint == "chat" and r.ok)
+        chat_ok = sum(tiers.values())
+        return {
+            "duration_s": round(self.wall_seconds, 2),
+            "achieved_rps": round(len(completed) / self.wall_seconds, 1) if self.wall_seconds else 0.0,
+            "dropped": len(self.results) - len(completed),
+            "endpoints": endpoints,
+            "chat_cache_tiers": dict(tiers),
+            "chat_cache_hit_ratio": round(1 - tiers.get("miss", 0) / chat_ok, 4) if chat_ok else 0.0
+        }
+
+
+def histogram(latencies_ms: List[float]) -> Dict[str, int]:
+    """Request counts per latency bucket, keyed "<=N" (ms) plus ">max" for the slowest"""
+    counts = {f"<={bound}": 0 for bound in HISTOGRAM_BOUNDS_MS}
+    counts[f">{HISTOGRAM_BOUNDS_MS[-1]}"] = 0
+    for latency in latencies_ms:
+        for bound in HISTOGRAM_BOUNDS_MS:
+            if latency <= bound:
+                counts[f"<={bound}"] += 1
+                break
+        else:
+            counts[f">{HISTOGRAM_BOUNDS_MS[-1]}"] += 1
+    return counts
+
+
+def format_histogram(counts: Dict[str, int], width: int = 40) -> str:
+    """Text bar chart of a histogram, skipping empty buckets at both ends"""
+    keys = list(counts)
+    used = [i for i, key in enumerate(keys) if counts[key]]
+    if not used:
+        return "  (no successful requests)"
+    total = sum(counts.values())
+    peak = max(counts.values())
+    lines = []
+    for key in keys[used[0]:used[-1] + 1]:
+        count = counts[key]
+        bar = "█" * max(1 if count else 0, round(count / peak * width))
+        lines.append(f"  {key + ' ms':>10}  {bar:<{width}}  {count} ({count / total:.1%})")
+    return "\n".join(lines)
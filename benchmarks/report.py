@@ -0,0 +1,89 @@
+# benchmarks/report.py
+import json
+from typing import List, Dict, Any, Optional
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of unsorted values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(latencies: List[float], wall_seconds: float) -> Dict[str, Any]:
+    """Latency percentiles (ms) and throughput for one timed run"""
+    ms = [latency * 1000 for latency in latencies]
+    return {
+        "requests": len(ms),
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "mean_ms": round(sum(ms) / len(ms), 2) if ms else 0.0,
+        "max_ms": round(max(ms), 2) if ms else 0.0,
+        "throughput_rps": round(len(ms) / wall_seconds, 1) if wall_seconds > 0 else 0.0
+    }
+
+
+COLUMNS = [
+    ("scenario", "scenario", "{}"),
+    ("requests", "reqs", "{}"),
+    ("errors", "errs", "{}"),
+    ("p50_ms", "p50 ms", "{:.2f}"),
+    ("p95_ms", "p95 ms", "{:.2f}"),
+    ("p99_ms", "p99 ms", "{:.2f}"),
+    ("throughput_rps", "req/s", "{:.1f}"),
+    ("alloc_peak_kb", "peak KB", "{:.0f}"),
+    ("alloc_retained_kb", "kept KB", "{:.0f}"),
+    ("llm_calls", "llm", "{}"),
+    ("prompt_tokens_avg", "prompt tok", "{:.0f}"),
+    ("docs_requests", "docs", "{}")
+]
+
+
+def format_table(results: List[Dict[str, Any]]) -> str:
+    """Fixed-width text table of scenario results"""
+    rows = [[label for _, label, _ in COLUMNS]]
+    for result in results:
+        rows.append([fmt.format(result[key]) if key in result else "-" for key, _, fmt in COLUMNS])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(COLUMNS))]
+    lines = []
+    for index, row in enumerate(rows):
+        lines.append("  ".join(
+            cell.ljust(widths[i]) if i == 0 else cell.rjust(widths[i]) for i, cell in enumerate(row)
+        ))
+        if index == 0:
+            lines.append("  ".join("-" * width for width in widths))
+    return "\n".join(lines)
+
+
+def write_report(report: Dict[str, Any], path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, max_regression: float,
+            metric: str = "p95_ms") -> List[str]:
+    """
+    Compare results with a saved report
+
+    Returns one message per scenario whose metric grew by more than
+    max_regression percent over the baseline.
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {r["scenario"]: r for r in json.load(f).get("results", [])}
+
+    regressions = []
+    for result in results:
+        before: Optional[Dict[str, Any]] = baseline.get(result["scenario"])
+        if not before or not before.get(metric):
+            continue
+        change = (result[metric] - before[metric]) / before[metric] * 100
+        if change > max_regression:
+            regressions.append(
+                f"{result['scenario']}: {metric} {before[metric]:.1f} -> {result[metric]:.1f} (+{change:.0f}%)"
+            )
+    return regressions
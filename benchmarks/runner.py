@@ -0,0 +1,285 @@
+# benchmarks/runner.py
+import asyncio
+import itertools
+import time
+import tracemalloc
+from typing import Awaitable, Callable, Dict, Any, Iterator, List, Optional
+
+import httpx
+
+from app.config import config
+from app.services.rag_service import RAGService
+from benchmarks.fake_docs import FakeDocsSite
+from benchmarks.fake_llm import FakeLLMClient
+from benchmarks.fake_server import build_rag_service, create_app, quiet, shutdown_rag_service
+from benchmarks.report import summarize
+
+# Questions answered from the local knowledge base
+KB_QUESTIONS = [
+    "How do I search for hotels?",
+    "How to cancel a booking",
+    "What is the rooms and rates API?",
+    "How do I book a room?",
+    "What does the static content API return?",
+    "How does price check work?",
+    "What is autosuggest used for?",
+    "How do I get hotel images?"
+]
+
+
+class BenchmarkError(Exception):
+    """A benchmark request did not take the path its scenario measures"""
+
+
+class Scenario:
+    """A named request pattern: call(request_id) sends one request; ids are unique per scenario"""
+
+    def __init__(self, name: str, description: str, call: Callable[[int], Awaitable[Any]],
+                 setup: Optional[Callable[[], Awaitable[None]]] = None,
+                 teardown: Optional[Callable[[], Awaitable[None]]] = None):
+        self.name = name
+        self.description = description
+        self.call = call
+        self.setup = setup
+        self.teardown = teardown
+
+
+class BenchmarkHarness:
+    """
+    Drives RAGService, or the /api endpoints in-process, against the fake LLM and docs site
+
+    Must run in a scratch working directory: the service reads and writes its
+    knowledge base, caches and analytics relative to the current directory.
+    """
+
+    def __init__(self, llm: FakeLLMClient, site: FakeDocsSite, target: str = "service", verbose: bool = False):
+        self.llm = llm
+        self.site = site
+        self.target = target
+        self.verbose = verbose
+        self.rag: Optional[RAGService] = None
+        self.http: Optional[httpx.AsyncClient] = None
+
+    async def start(self):
+        self.rag = build_rag_service(self.llm, self.site, self.verbose)
+
+        if self.target == "http":
+            # Exercises request parsing, validation and serialization as well
+            app = create_app(self.rag)
+            self.http = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark")
+
+    async def aclose(self):
+        if self.http is not None:
+            await self.http.aclose()
+        if self.rag is not None:
+            # Flushes analytics while the workspace still exists
+            await shutdown_rag_service(self.rag)
+
+    async def ask(self, question: str):
+        if self.http is not None:
+            response = await self.http.post("/api/chat", json={"question": question})
+            response.raise_for_status()
+            return response.json()
+        result = await self.rag.generate_answer(question)
+        if result["source_type"] == "none":
+            raise BenchmarkError(f"No documentation found for: {question}")
+        return result
+
+    async def explain(self, content: str):
+        if self.http is not None:
+            response = await self.http.post("/api/explain", json={"input_type": "error_code", "content": content})
+            response.raise_for_status()
+            return response.json()
+        result = await self.rag.explain_error(content)
+        if result["source_type"] == "none":
+            raise BenchmarkError(f"No documentation found for: {content}")
+        return result
+
+    def _live_keywords(self, limit: int = 8) -> List[str]:
+        """Documentation keywords with no local knowledge base match - they always go live"""
+        fetcher = self.rag.doc_fetcher
+        keywords = []
+        with quiet(not self.verbose):
+            for keyword_map in (fetcher.doc_map, fetcher.recipes_map, fetcher.reference_map):
+                for keyword in keyword_map:
+                    if 'error' in keyword or keyword in keywords:
+                        continue
+                    if not self.rag._search_local_knowledge_base(keyword):
+                        keywords.append(keyword)
+                        if len(keywords) == limit:
+                            return keywords
+        return keywords
+
+    def _without_page_store(self):
+        """Setup/teardown pair making every documentation lookup a full download and parse"""
+        page_store = self.rag.doc_fetcher.page_store
+        saved = {}
+
+        async def setup():
+            saved['fresh_seconds'] = page_store.fresh_seconds
+            page_store.fresh_seconds = 0
+
+        async def teardown():
+            page_store.fresh_seconds = saved['fresh_seconds']
+
+        return setup, teardown
+
+    def build_scenarios(self) -> Dict[str, Scenario]:
+        """
+        Request ids are appended to questions and errors so every request misses the
+        response cache (and is never coalesced) unless the scenario measures cache hits.
+        """
+        scenarios = []
+
+        async def prime_cache():
+            for question in KB_QUESTIONS:
+                await self.ask(question)
+
+        scenarios.append(Scenario(
+            "cache_hit", "repeated questions served from the response cache",
+            lambda i: self.ask(KB_QUESTIONS[i % len(KB_QUESTIONS)]),
+            setup=prime_cache
+        ))
+
+        scenarios.append(Scenario(
+            "local_kb", "new questions answered from the local knowledge base",
+            lambda i: self.ask(f"{KB_QUESTIONS[i % len(KB_QUESTIONS)]} #{i:06d}")
+        ))
+
+        live_keywords = self._live_keywords()
+        live_setup, live_teardown = self._without_page_store()
+
+        async def live_fetch_setup():
+            if not live_keywords:
+                raise BenchmarkError("Every documentation keyword matches the local knowledge base")
+            await live_setup()
+
+        scenarios.append(Scenario(
+            "live_fetch", "questions missing the knowledge base, fetched and parsed from the docs site",
+            lambda i: self.ask(f"{live_keywords[i % len(live_keywords)]} #{i:06d}"),
+            setup=live_fetch_setup, teardown=live_teardown
+        ))
+
+        catalog = self.rag.error_catalog.entries
+        codes = sorted(catalog)[:20]
+
+        async def explain_setup():
+            if not codes:
+                raise BenchmarkError("The error catalog is empty")
+
+        def catalog_error(i: int) -> str:
+            code = codes[i % len(codes)]
+            return f"Error {code}: {catalog[code]['message']} ref{i:06d}"
+
+        scenarios.append(Scenario(
+            "explain", "errors with catalogued codes",
+            lambda i: self.explain(catalog_error(i)),
+            setup=explain_setup
+        ))
+
+        unknown_codes = [str(code) for code in range(9000, 10000) if str(code) not in catalog][:20]
+        scenarios.append(Scenario(
+            "explain_live", "errors with unknown codes, looked up across the live API pages",
+            lambda i: self.explain(f"Error {unknown_codes[i % len(unknown_codes)]}: request ref{i:06d} failed"),
+            setup=live_setup, teardown=live_teardown
+        ))
+
+        return {scenario.name: scenario for scenario in scenarios}
+
+    async def _drive(self, scenario: Scenario, count: int, concurrency: int, ids: Iterator) -> Dict[str, Any]:
+        """Send count requests from concurrency workers; returns latencies, errors and wall time"""
+        latencies: List[float] = []
+        errors: List[str] = []
+        remaining = iter(range(count))
+
+        async def worker():
+            for _ in remaining:
+                request_id = next(ids)
+                start = time.perf_counter()
+                try:
+                    await scenario.call(request_id)
+                except Exception as e:
+                    errors.append(str(e))
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with quiet(not self.verbose):
+            await asyncio.gather(*[worker() for _ in range(max(1, min(concurrency, count)))])
+        return {"latencies": latencies, "errors": errors, "wall": time.perf_counter() - start}
+
+    async def run(self, scenario: Scenario, requests: int, concurrency: int,
+                  warmup: int = 5, alloc_requests: int = 50) -> Dict[str, Any]:
+        """
+        Run one scenario: untimed warmup, the timed run, then a separate pass under
+        tracemalloc (tracing slows Python down, so it never overlaps the timed run)
+        """
+        ids = itertools.count()
+        with quiet(not self.verbose):
+            if scenario.setup:
+                await scenario.setup()
+        try:
+            await self._drive(scenario, warmup, concurrency, ids)
+
+            self.llm.reset_stats()
+            self.site.reset_stats()
+            timed = await self._drive(scenario, requests, concurrency, ids)
+
+            result = {
+                "scenario": scenario.name,
+                **summarize(timed["latencies"], timed["wall"]),
+                "errors": len(timed["errors"]),
+                "llm_calls": self.llm.calls,
+                "prompt_tokens_avg": round(self.llm.prompt_tokens / self.llm.calls, 1) if self.llm.calls else 0.0,
+                "docs_requests": self.site.requests
+            }
+            if timed["errors"]:
+                result["first_error"] = timed["errors"][0]
+
+            if alloc_requests:
+                tracemalloc.start()
+                baseline = tracemalloc.get_traced_memory()[0]
+                await self._drive(scenario, alloc_requests, concurrency, ids)
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                result["alloc_peak_kb"] = round((peak - baseline) / 1024, 1)
+                result["alloc_retained_kb"] = round((current - baseline) / 1024, 1)
+        finally:
+            if scenario.teardown:
+                await scenario.teardown()
+        return result
+
+
+async def run_benchmarks(llm: FakeLLMClient, site: FakeDocsSite, scenario_names: List[str], requests: int,
+                         concurrency: int, warmup: int, alloc_requests: int, target: str = "service",
+                         verbose: bool = False) -> Dict[str, Any]:
+    """Run the selected scenarios in order; returns the report {"config", "results"}"""
+    harness = BenchmarkHarness(llm, site, target=target, verbose=verbose)
+    print(f"⚙️ Building RAG service (target: {target})")
+    await harness.start()
+    results = []
+    try:
+        scenarios = harness.build_scenarios()
+        for name in scenario_names:
+            scenario = scenarios[name]
+            print(f"⏱️ {name}: {scenario.description}")
+            try:
+                results.append(await harness.run(scenario, requests, concurrency, warmup, alloc_requests))
+            except BenchmarkError as e:
+                print(f"  ✗ Skipped {name}: {e}")
+    finally:
+        await harness.aclose()
+
+    return {
+        "config": {
+            "target": target,
+            "requests": requests,
+            "concurrency": concurrency,
+            "llm": llm.get_model_info(),
+            "docs_latency": repr(site.latency),
+            "docs_sections": site.sections,
+            "chunk_max_tokens": config.CHUNK_MAX_TOKENS,
+            "live_context_token_budget": config.LIVE_CONTEXT_TOKEN_BUDGET
+        },
+        "results": results
+    }
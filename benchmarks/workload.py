@@ -0,0 +1,93 @@
+# benchmarks/workload.py
+import json
+import random
+from bisect import bisect
+from itertools import accumulate
+from typing import Dict, Optional, Tuple
+
+# Prefix analytics uses for queries logged by /api/explain
+EXPLAIN_PREFIX = "[EXPLAIN] "
+
+
+class _WeightedChoice:
+    """Weighted sampling by binary search over cumulative weights"""
+
+    def __init__(self, weights: Dict[str, float]):
+        self.items = list(weights)
+        self.cumulative = list(accumulate(weights[item] for item in self.items))
+
+    def sample(self, rng: random.Random) -> str:
+        return self.items[bisect(self.cumulative, rng.random() * self.cumulative[-1])]
+
+
+class QueryDistribution:
+    """
+    Production query mix recorded in analytics_data.json
+
+    Queries are drawn with their recorded frequencies (query_counter), so
+    repeated questions - and the cache hits they produce - occur as often as
+    in production. Each query is attributed to a client that asked it, taken
+    from the per-client counters (legacy client_query_counter, or the top
+    queries kept with client_sketches); otherwise to any client, weighted by
+    its query volume.
+    """
+
+    def __init__(self, queries: Dict[str, int], client_queries: Optional[Dict[str, Dict[str, int]]] = None,
+                 client_totals: Optional[Dict[str, int]] = None, seed: int = 0):
+        queries = {query: count for query, count in queries.items() if count > 0 and query.strip()}
+        if not queries:
+            raise ValueError("No queries recorded - nothing to replay")
+        self.queries = queries
+        self._rng = random.Random(seed)
+        self._queries = _WeightedChoice(queries)
+
+        client_queries = client_queries or {}
+        askers: Dict[str, Dict[str, int]] = {}
+        for client_id, counts in client_queries.items():
+            for query, count in counts.items():
+                if count > 0:
+                    askers.setdefault(query, {})[client_id] = count
+        self._askers = {query: _WeightedChoice(clients) for query, clients in askers.items()}
+
+        totals = client_totals or {client_id: sum(counts.values()) for client_id, counts in client_queries.items()}
+        totals = {client_id: total for client_id, total in totals.items() if total > 0}
+        self._clients = _WeightedChoice(totals) if totals else None
+
+    @classmethod
+    def from_analytics(cls, path: str, seed: int = 0) -> "QueryDistribution":
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        client_queries = data.get("client_query_counter")
+        client_totals = None
+        if not client_queries and data.get("client_sketches"):
+            # Sketches keep exact totals and each client's estimated top queries
+            sketches = data["client_sketches"]
+            client_queries = {client_id: stats.get("top", {}) for client_id, stats in sketches.items()}
+            client_totals = {client_id: stats.get("total", 0) for client_id, stats in sketches.items()}
+
+        return cls(data.get("query_counter", {}), client_queries, client_totals, seed)
+
+    def sample(self) -> Tuple[str, str, bool]:
+        """(client id, query, is_explain) - explain queries have the analytics prefix removed"""
+        query = self._queries.sample(self._rng)
+        if query in self._askers:
+            client_id = self._askers[query].sample(self._rng)
+        elif self._clients:
+            client_id = self._clients.sample(self._rng)
+        else:
+            client_id = "loadgen"
+
+        if query.startswith(EXPLAIN_PREFIX):
+            return client_id, query[len(EXPLAIN_PREFIX):], True
+        return client_id, query, False
+
+    def describe(self) -> Dict[str, int]:
+        explain = sum(count for query, count in self.queries.items() if query.startswith(EXPLAIN_PREFIX))
+        total = sum(self.queries.values())
+        return {
+            "distinct_queries": len(self.queries),
+            "recorded_queries": total,
+            "recorded_explain": explain,
+            "recorded_chat": total - explain
+        }
@@ -0,0 +1,34 @@
+# benchmarks/workspace.py
+import shutil
+import tempfile
+from pathlib import Path
+
+from app.config import config
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def create_workspace() -> str:
+    """
+    Scratch directory holding copies of the knowledge base files
+
+    The service keeps caches, analytics and the page store relative to the
+    working directory, so benchmarks run there and never touch the real ones.
+    Switch to it before importing app.utils.analytics, which loads its data
+    file on import.
+    """
+    workspace = tempfile.mkdtemp(prefix="chatbot-bench-")
+    for kb_file in config.KNOWLEDGE_BASE_FILES:
+        source = REPO_ROOT / kb_file
+        if source.exists():
+            target = Path(workspace) / kb_file
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(source, target)
+    return workspace
+
+
+def remove_workspace(workspace: str, keep: bool = False):
+    if keep:
+        print(f"📁 Workspace kept at {workspace}")
+    else:
+        shutil.rmtree(workspace, ignore_errors=True)
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""Crawl every known documentation page into a local knowledge base snapshot"""
+import argparse
+import asyncio
+
+from app.config import config
+from app.services.crawler import DocsCrawler
+from app.services.doc_fetcher import DocumentationFetcher
+
+
+async def main(args):
+    fetcher = DocumentationFetcher()
+    await fetcher.start()
+    try:
+        crawler = DocsCrawler(fetcher, concurrency=args.concurrency, rate=args.rate, workers=args.workers)
+        snapshot = await crawler.crawl()
+    finally:
+        await fetcher.aclose()
+        fetcher.page_store.close()
+
+    if not snapshot:
+        print("❌ No pages crawled - snapshot not written")
+        return 1
+    crawler.write_snapshot(snapshot, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--output", default=config.DOCS_SNAPSHOT_PATH, help="Snapshot file (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=config.CRAWL_CONCURRENCY, help="Parallel requests (default: %(default)s)")
+    parser.add_argument("--rate", type=float, default=config.CRAWL_RATE_LIMIT, help="Requests per second (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=config.CRAWL_PARSE_WORKERS, help="Parser processes (default: CPU count)")
+    raise SystemExit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Replay the production query mix from analytics_data.json against /api/chat and /api/explain"""
+import argparse
+import asyncio
+import json
+import os
+
+import httpx
+
+from benchmarks.cli import add_fake_service_arguments, build_fakes
+from benchmarks.workspace import create_workspace, remove_workspace
+
+
+async def run(args, client: httpx.AsyncClient):
+    from benchmarks.loadgen import LoadGenerator, format_histogram
+    from benchmarks.workload import QueryDistribution
+
+    workload = QueryDistribution.from_analytics(args.analytics, seed=args.seed)
+    mix = workload.describe()
+    print(f"📊 Replaying {mix['distinct_queries']} distinct queries "
+          f"({mix['recorded_chat']} chat / {mix['recorded_explain']} explain recorded)")
+
+    generator = LoadGenerator(client, workload, seed=args.seed)
+    if args.rps:
+        print(f"⏱️ Open loop at {args.rps} req/s for {args.duration}s")
+        await generator.run_rate(args.rps, args.duration, args.requests, args.max_in_flight)
+    else:
+        print(f"⏱️ Closed loop with {args.concurrency} clients for {args.duration}s")
+        await generator.run_concurrency(args.concurrency, args.duration, args.requests)
+
+    summary = generator.summary()
+    print(f"\n{summary['achieved_rps']} req/s over {summary['duration_s']}s, {summary['dropped']} dropped")
+    for endpoint, stats in summary["endpoints"].items():
+        print(f"\n{endpoint}: {stats['requests']} requests, {stats['error_rate']:.2%} errors, "
+              f"p50 {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms")
+        print(format_histogram(stats["histogram"]))
+        for kind, count in stats["error_kinds"].items():
+            print(f"  ✗ {count} x {kind}")
+    if summary["chat_cache_tiers"]:
+        tiers = ", ".join(f"{tier} {count}" for tier, count in sorted(summary["chat_cache_tiers"].items()))
+        print(f"\nchat cache: {tiers} (hit ratio {summary['chat_cache_hit_ratio']:.1%})")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        print(f"💾 Wrote report to {args.output}")
+    return summary
+
+
+async def main(args):
+    timeout = httpx.Timeout(args.timeout)
+    if args.url:
+        limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+        async with httpx.AsyncClient(base_url=args.url, timeout=timeout, limits=limits) as client:
+            await run(args, client)
+        return 0
+
+    # In-process server on the fake LLM; shares the event loop with the generator
+    from benchmarks.fake_server import build_rag_service, create_app, shutdown_rag_service
+
+    llm, site = build_fakes(args)
+    rag = build_rag_service(llm, site, args.verbose)
+    transport = httpx.ASGITransport(app=create_app(rag))
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadgen", timeout=timeout) as client:
+            await run(args, client)
+    finally:
+        await shutdown_rag_service(rag)
+    print(f"🤖 Fake LLM calls: {llm.calls}, docs site requests: {site.requests}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--analytics", default="analytics_data.json", help="Analytics file to replay (default: %(default)s)")
+    parser.add_argument("--url", help="Server to load (e.g. one started with run_fake_server.py); default: in-process fake server")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--rps", type=float, help="Open loop: target requests per second")
+    mode.add_argument("--concurrency", type=int, default=10, help="Closed loop: concurrent clients (default: %(default)s)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run (default: %(default)s)")
+    parser.add_argument("--requests", type=int, help="Stop after this many requests")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Open loop: drop requests beyond this (default: %(default)s)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds (default: %(default)s)")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    add_fake_service_arguments(parser)
+    args = parser.parse_args()
+
+    # Paths are given relative to where the command was run
+    args.analytics = os.path.abspath(args.analytics)
+    if args.output:
+        args.output = os.path.abspath(args.output)
+
+    if args.url:
+        raise SystemExit(asyncio.run(main(args)))
+
+    workspace = create_workspace()
+    os.chdir(workspace)
+    try:
+        exit_code = asyncio.run(main(args))
+    finally:
+        remove_workspace(workspace, keep=args.keep_workspace)
+    raise SystemExit(exit_code)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Benchmark the chat pipeline offline against a fake LLM and a local stand-in for the docs site"""
+import argparse
+import asyncio
+import os
+
+from benchmarks.cli import add_fake_service_arguments, build_fakes
+from benchmarks.workspace import create_workspace, remove_workspace
+
+SCENARIOS = ["cache_hit", "local_kb", "live_fetch", "explain", "explain_live"]
+
+
+async def main(args):
+    # Imported after switching to the workspace: analytics opens its data file on import
+    from benchmarks.report import compare, format_table, write_report
+    from benchmarks.runner import run_benchmarks
+
+    llm, site = build_fakes(args)
+
+    report = await run_benchmarks(
+        llm, site, args.scenarios, requests=args.requests, concurrency=args.concurrency,
+        warmup=args.warmup, alloc_requests=0 if args.no_alloc else args.alloc_requests,
+        target=args.target, verbose=args.verbose
+    )
+
+    print()
+    print(format_table(report["results"]))
+    for result in report["results"]:
+        if result.get("first_error"):
+            print(f"⚠️ {result['scenario']}: {result['errors']} errors, first: {result['first_error']}")
+
+    if args.output:
+        write_report(report, args.output)
+        print(f"💾 Wrote report to {args.output}")
+
+    if args.baseline:
+        regressions = compare(report["results"], args.baseline, args.max_regression)
+        if regressions:
+            print(f"❌ p95 regressions over {args.max_regression}%:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print(f"✅ No p95 regression over {args.max_regression}% against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS, help="Scenarios to run (default: all)")
+    parser.add_argument("--requests", type=int, default=200, help="Timed requests per scenario (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=10, help="Requests in flight (default: %(default)s)")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed requests before each scenario (default: %(default)s)")
+    parser.add_argument("--target", choices=["service", "http"], default="service",
+                        help="Call RAGService directly or the /api endpoints in-process (default: %(default)s)")
+    parser.add_argument("--alloc-requests", type=int, default=50, help="Requests in the tracemalloc pass (default: %(default)s)")
+    parser.add_argument("--no-alloc", action="store_true", help="Skip the allocation pass")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report to compare against; exits 1 on regression")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="Allowed p95 increase in percent (default: %(default)s)")
+    add_fake_service_arguments(parser)
+    args = parser.parse_args()
+
+    # Report paths are given relative to where the command was run
+    for name in ("output", "baseline"):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+
+    workspace = create_workspace()
+    os.chdir(workspace)
+    try:
+        exit_code = asyncio.run(main(args))
+    finally:
+        remove_workspace(workspace, keep=args.keep_workspace)
+    raise SystemExit(exit_code)
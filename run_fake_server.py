@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""Serve the API wired to the fake LLM and docs site - a safe target for load tests"""
+import argparse
+import os
+
+import uvicorn
+
+from benchmarks.cli import add_fake_service_arguments, build_fakes
+from benchmarks.workspace import create_workspace, remove_workspace
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=8090, help="Port (default: %(default)s)")
+    add_fake_service_arguments(parser)
+    args = parser.parse_args()
+
+    workspace = create_workspace()
+    os.chdir(workspace)
+    try:
+        # Imported after switching to the workspace: analytics opens its data file on import
+        from benchmarks.fake_server import build_rag_service, create_app
+
+        llm, site = build_fakes(args)
+        app = create_app(build_rag_service(llm, site, args.verbose))
+        print(f"🚀 Starting fake-LLM server on {args.host}:{args.port} (LLM latency {llm.latency}, docs latency {site.latency})")
+        uvicorn.run(app, host=args.host, port=args.port, log_level="info" if args.verbose else "warning")
+    finally:
+        remove_workspace(workspace, keep=args.keep_workspace)
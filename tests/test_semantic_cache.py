@@ -0,0 +1,35 @@
+# tests/test_semantic_cache.py
+from app.config import config
+from app.services.semantic_cache import SemanticQuestionIndex, normalize_question
+from app.services.vector_store import HashingEmbedder
+
+
+def make_index() -> SemanticQuestionIndex:
+    return SemanticQuestionIndex(
+        HashingEmbedder(dim=config.VECTOR_DIM),
+        threshold=config.RESPONSE_CACHE_SEMANTIC_THRESHOLD,
+        max_entries=100
+    )
+
+
+def test_negated_question_does_not_match():
+    index = make_index()
+    index.add("allowed", normalize_question("Is refund allowed after cancellation?"))
+
+    assert index.find(normalize_question("Is refund not allowed after cancellation?")) is None
+    assert index.find(normalize_question("Why can't I get a refund after cancellation?")) is None
+
+
+def test_rewording_still_matches():
+    index = make_index()
+    index.add("allowed", normalize_question("Is refund allowed after cancellation?"))
+
+    match = index.find(normalize_question("is a refund allowed after the cancellation"))
+    assert match is not None and match[0] == "allowed"
+
+
+def test_request_and_response_do_not_match():
+    index = make_index()
+    index.add("request", normalize_question("What are the search request fields?"))
+
+    assert index.find(normalize_question("What are the search response fields?")) is None